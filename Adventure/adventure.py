@@ -1,9 +1,24 @@
-from game_data import World, Statistics, Exam, Location, Item
+import metrics
+from events import TextRenderer
+from game_data import World, WorldState, Statistics, Exam, Location, Item, EXIT_NAMES
 from player import Player
+from snapshot import read_snapshot
+from tiles import TiledWorld
+from timeline import Timeline
+
+DIRECTIONS = {"north": (0, -1), "south": (0, 1), "west": (-1, 0), "east": (1, 0)}
+# Every action a menu can offer but quit: the name of the Game method that carries it out, its arguments, and
+# whether a blank line follows what it prints. The item actions are given the name of the item as their argument.
+ACTIONS = {"buy": ("buy", (), True), "look": ("look", (), False), "search": ("search", (), True),
+           "inventory": ("inventory", (), True), "score": ("score", (), False),
+           "take": ("take", (), True), "drop": ("drop", (), True)}
+ACTIONS.update(("go " + name, ("move", displacement, False)) for name, displacement in DIRECTIONS.items())
+ITEM_ACTIONS = ("take", "drop")
 
 
 class Game:
-    def __init__(self, map_name, location_name, item_name, exam_name, x, y, hour, minute, end_hour, end_minute):
+    def __init__(self, map_name, location_name, item_name, exam_name, x, y, hour, minute, end_hour, end_minute,
+                 snapshot_name=None, lazy=False, output=None, tiles_name=None, compressed=False):
         """
         Creates a new Game object, with a world filled with locations that have items within them,
             a player that is created at a given position, a time set at a given time, and an end time
@@ -18,36 +33,87 @@ class Game:
         :param minute: integer value of the minutes of the time initially set in the game
         :param end_hour: integer value of the hour of the time that the game ends
         :param end_minute: integer value of the minutes of the time that the game ends
+        :param snapshot_name: (Optional) string that gives name of a compiled world snapshot of the four data files.
+            It is used instead of the text files if it exists and was compiled from their current contents.
+        :param lazy: (Optional) bool value, True to leave location descriptions in the memory-mapped location file
+            until they are shown (see World.map_locations)
+        :param output: (Optional) renderer that the game's events are emitted to (see events.py).
+            If not given, they are written to standard output as they happen.
+        :param tiles_name: (Optional) string that gives name of a tiled world file (see tiles.py). If given, the
+            world is read from it a tile at a time, as the player gets near, and the map, location and item files
+            are not read.
+        :param compressed: (Optional) bool value, True to keep location descriptions compressed in memory until they
+            are shown (see game_data.CompressedDescriptions)
         :return:
         '"""
         self.questions = 0
         self.over = False
         self.lost = False
-        self.final_exam = Exam(exam_name)
-        self.world = World(map_name, location_name, item_name)
+        self.output = output if output is not None else TextRenderer()
+        # Menus already built, keyed by everything a menu depends on (see menu)
+        self.menus = {}
+        snapshot = None
+        if snapshot_name is not None:
+            snapshot = read_snapshot(snapshot_name, [map_name, location_name, item_name, exam_name])
+        self.final_exam = Exam(exam_name, snapshot, self.output)
+        if tiles_name is not None:
+            self.world = TiledWorld(tiles_name)
+        else:
+            self.world = World(map_name, location_name, item_name, snapshot, lazy, compressed)
+        self.world_state = WorldState(self.world)
+        self.start = (x, y)
+        self.clock = (hour, minute, end_hour, end_minute)
+        # Scheduled world events, see timeline.py
+        self.timeline = Timeline()
         self.player = Player(x, y)
         self.statistics = Statistics(hour, minute, end_hour, end_minute)
 
+    def reset(self):
+        """
+        Puts the game back to how it was when it was created, without reading any of the data files again.
+        :return: none
+        """
+        self.questions = 0
+        self.over = False
+        self.lost = False
+        self.final_exam.reset()
+        self.world_state.reset(self.player.get_inventory())
+        self.player = Player(*self.start)
+        self.statistics = Statistics(*self.clock)
+        self.timeline.reset()
+
+    def set_output(self, output):
+        """
+        Sends the game's events, including the exam's, to a different renderer.
+        :param output: renderer object with emit and flush methods (see events.py)
+        :return: none
+        """
+        self.output = output
+        self.final_exam.output = output
+
+    def say(self, text=""):
+        """
+        Emits a line of text that is not about the game itself, such as a background message.
+        :param text: (Optional) string line, without its line ending. If not given, an empty line.
+        :return: none
+        """
+        self.output.emit("text", text)
+
     def menu(self):
         """
         Prints out all possible actions and returns a list of all available actions.
         :return: a list of all possible actions
         """
         position = self.player.get_position()
-        location = self.world.get_location(position)
-        directions = self.world.available_moves(position)
-        print(" : ".join(directions))
-        menu = []
-        if self.player.has_item():
-            menu.append("drop")
-        if location.has_item():
-            menu.append("take")
-        if location.has_coffee():
-            menu.append("buy")
-        menu += ["look", "search", "inventory", "score", "quit"]
-        print(" : ".join(menu))
-        menu += ["go north", "go south", "go east", "go west"]
-        return menu
+        # There are only 128 different menus, so each one is built the first time it is needed and looked up after
+        key = (self.world.get_exits(position), self.player.has_item(), self.world_state.has_item(position),
+               self.world_state.has_coffee(position))
+        cached = self.menus.get(key)
+        if cached is None:
+            cached = self.menus[key] = build_menu(*key)
+        directions, menu, allowed = cached
+        self.output.emit("menu", directions, menu)
+        return allowed
 
     def time(self):
         """
@@ -55,7 +121,7 @@ class Game:
         :return: none
         """
         text = self.statistics.str_time()
-        print(text)
+        self.output.emit("time", text)
 
     def exam_time(self):
         """
@@ -63,7 +129,7 @@ class Game:
         :return: none
         """
         text = self.statistics.str_exam_time()
-        print("Your exam is at", text)
+        self.output.emit("exam_time", text)
 
     def look(self):
         """
@@ -72,7 +138,7 @@ class Game:
         """
         position = self.player.get_position()
         location = self.world.get_location(position)
-        print(location.get_long_description())
+        self.output.emit("description", location.get_long_description())
 
     def search(self):
         """
@@ -80,23 +146,21 @@ class Game:
         :return: none
         """
         position = self.player.get_position()
-        location = self.world.get_location(position)
         tiredness = self.player.get_tiredness()
         self.statistics.search(tiredness)
-        if location.has_item():
-            print("You managed to find the following items:")
-            items = location.get_item()
+        if self.world_state.has_item(position):
+            items = self.world_state.get_items(position)
             lst_item = [item.get_name() for item in items]
-            str_items = ", ".join(lst_item)
-            print(str_items)
+            self.output.emit("found", lst_item)
         else:
-            print("There is nothing here!")
+            self.output.emit("nothing_found")
+        self.timeline.advance(self, self.statistics.clock)
 
     def move(self, x_dist, y_dist):
         """
         Moves the player position (x,y) to (x + x_dist, y + y_dist).
         Moves the player back to the previous location if the target location is blocked.
-        Updates player's statistics.
+        Updates player's statistics, and fires any world events that are due by the new time.
         Prints out location description.
         :param x_dist:
         :param y_dist:
@@ -104,17 +168,17 @@ class Game:
         """
         position = self.player.move(x_dist, y_dist)
         location = self.world.get_location(position)
+        visited = self.world_state.is_visited(position)
         tiredness = self.player.get_tiredness()
-        points = location.get_points()
+        points = location.get_points(visited)
         self.player.update_tiredness(1)
         self.statistics.move(points, tiredness)
-        name = location.get_name().upper()
-        print(name)
-        print(location.get_description())
+        self.output.emit("location", location.get_name(), location.get_description(visited))
         if self.world.is_location(position):
-            location.visit()
+            self.world_state.visit(position)
         else:
             self.player.move(-x_dist, -y_dist)
+        self.timeline.advance(self, self.statistics.clock)
 
     def inventory(self):
         """
@@ -125,10 +189,9 @@ class Game:
         if self.player.has_item():
             inventory = self.player.get_inventory()
             lst_inventory = [item.get_name() for item in inventory]
-            str_inventory = ", ".join(lst_inventory)
-            print(str_inventory)
+            self.output.emit("inventory", lst_inventory)
         else:
-            print("You have no items!")
+            self.output.emit("no_items")
 
     def take(self, name):
         """
@@ -137,15 +200,15 @@ class Game:
         :return:none
         """
         position = self.player.get_position()
-        location = self.world.get_location(position)
-        if location.has_item(name):
-            item = location.pop_item(name)
+        # Taken in one step rather than looked for first, as other players may share the items (see multiplayer.py)
+        item = self.world_state.pop_item(position, name)
+        if item is not None:
             points = item.get_points()
             self.statistics.add_points(points)
             self.player.add_item(item)
-            print("Took", name)
+            self.output.emit("took", name)
         else:
-            print("There is no item", name)
+            self.output.emit("no_such_item", name)
 
     def drop(self, name):
         """
@@ -154,15 +217,14 @@ class Game:
         :return: none
         """
         position = self.player.get_position()
-        location = self.world.get_location(position)
         if self.player.has_item(name):
             item = self.player.pop_item(name)
             points = item.get_points()
             self.statistics.add_points(-points)
-            location.add_item(item)
-            print("Dropped", name)
+            self.world_state.add_item(position, item)
+            self.output.emit("dropped", name)
         else:
-            print("You do not have item", name)
+            self.output.emit("not_carried", name)
 
     def score(self):
         """
@@ -170,8 +232,7 @@ class Game:
         :return: none
         """
         score = self.statistics.get_score()
-        print("Your score is", score)
-        print()
+        self.output.emit("score", score)
 
     def check(self):
         """
@@ -179,28 +240,28 @@ class Game:
         or if all the items are in their required destination.
         :return: none
         """
-        position = self.player.get_position()
-        inventory = self.player.get_inventory()
         if self.statistics.is_past_exam():
             self.over = True
             self.lost = True
-        elif len(inventory) == self.world.get_total_items():
-            for item in inventory:
-                if item.target != position:
-                    break
-            else:  # no break
-                self.over = True
+        # Every item is held, at its target, exactly when as many held items have their target here as there are
+        # items. The player keeps count, so this does not depend on how many items there are.
+        elif self.player.count_targets(self.player.get_position()) == self.world.get_total_items():
+            self.over = True
 
-    def exam(self):
+    def exam(self, answers=None):
         """
         Runs the exam through the exam class, based on the questions given in the puzzle file.
+        :param answers: (Optional) iterator of string answers to use instead of reading from input.
+            Questions left once it runs out are answered with an empty string.
         :return: True of the player passes, False if they do not.
         """
-        print("Your exam is about to begin!")
-        print()
+        self.output.emit("exam_start")
         for question in range(self.final_exam.get_length()):
             self.final_exam.administer_question()
-            self.final_exam.check_answer()
+            if answers is None:
+                self.final_exam.check_answer()
+            else:
+                self.final_exam.check_answer(next(answers, ""))
         return self.final_exam.did_pass()
 
     def buy(self):
@@ -210,7 +271,102 @@ class Game:
         """
         self.statistics.buy_coffee()
         self.player.update_tiredness(-5)
-        print("Bought coffee. Boy that was good!")
+        self.output.emit("coffee")
+        self.timeline.advance(self, self.statistics.clock)
+
+
+def build_menu(exits, holding, here, coffee):
+    """
+    :param exits: integer mask of the directions the player can move in (see World.get_exits)
+    :param holding: bool value, True if the player has an item
+    :param here: bool value, True if there is an item at the player's location
+    :param coffee: bool value, True if coffee is sold at the player's location
+    :return: tuple of the list of direction actions shown, the list of other actions shown and the list of all
+        allowed actions
+    """
+    menu = []
+    if holding:
+        menu.append("drop")
+    if here:
+        menu.append("take")
+    if coffee:
+        menu.append("buy")
+    menu += ["look", "search", "inventory", "score", "quit"]
+    return list(EXIT_NAMES[exits]), menu, menu + ["go north", "go south", "go east", "go west"]
+
+
+def split_commands(line):
+    """
+    Splits a line of input into the commands in it, separated by semicolons, so that many can be given at once
+    (go south; go west; search).
+    :param line: string line of input
+    :return: list of string commands, in order. A line without semicolons is one command, as it was typed.
+    """
+    if ";" not in line:
+        return [line]
+    return [command.strip() for command in line.split(";") if command.strip()] or [""]
+
+
+def resolve(command, allowed):
+    """
+    Finds the action a command asks for. Any word of an action can be shortened to a prefix of it (se for search,
+    g n for go north) as long as only one allowed action matches. Take and drop can be followed by the name of the
+    item on the same line (take T-Card).
+    :param command: string command, as typed
+    :param allowed: list of the string actions allowed, as returned by Game.menu
+    :return: tuple of the string action and the string item name, which is empty if none was given. The action is
+        None if the command is not allowed, or could be more than one allowed action.
+    """
+    lowered = command.lower()
+    if lowered in allowed:
+        return lowered, ""
+    words = lowered.split()
+    found = None
+    for action in allowed:
+        names = action.split()
+        if len(words) < len(names) or len(words) > len(names) and action not in ITEM_ACTIONS:
+            continue
+        for name, word in zip(names, words):
+            if not name.startswith(word):
+                break
+        else:  # no break
+            if found is not None:
+                return None, ""
+            found = action
+    if found is None:
+        return None, ""
+    # The item name keeps its case, and any spaces within it
+    parts = command.split(None, len(found.split()))
+    return found, parts[-1] if len(parts) > len(found.split()) else ""
+
+
+def dispatch(game, action, name=""):
+    """
+    Carries out one allowed action, printing what run_game prints, without checking whether the game is over
+    afterwards. Quitting is left to the caller.
+    :param game: a Game object
+    :param action: string action from the menu, other than quit
+    :param name: (Optional) string name of the item to take or drop
+    :return: none
+    """
+    method, arguments, spaced = ACTIONS[action]
+    if action in ITEM_ACTIONS:
+        arguments = (name,)
+    getattr(game, method)(*arguments)
+    if spaced:
+        game.say()
+
+
+def ask_item(game, action):
+    """
+    Asks which item to take or drop, when the command did not say. Before dropping, the inventory is shown.
+    :param game: a Game object
+    :param action: string action, take or drop
+    :return: none
+    """
+    if action == "drop":
+        game.inventory()
+    game.say(action.capitalize() + " what?")
 
 
 def background_information(background_file):
@@ -235,77 +391,97 @@ def background_information(background_file):
     return background
 
 
+def new_game(output=None):
+    """
+    Creates a Game for the bundled world, with the player starting at the exam room at 8:00 and the exam at 13:00.
+    :param output: (Optional) renderer that the game's events are emitted to, see Game
+    :return: a new Game object
+    """
+    # Input Names (Magic numbers)
+    return Game("map.txt", "locations.txt", "items.txt", "puzzle.txt", 2, 3, 8, 0, 13, 0, "world.snap",
+                output=output)
+
+
 def run_game():
     """
-    Starts the game itself. Allows the player to recursively replay the game.
+    Starts the game itself. Allows the player to replay the game as many times as they like.
+    The data files are only read once; every replay resets the same game.
+    Output is held back and written once per turn, just before the game waits for input.
     :return: none
     """
-    # Input Names (Magic numbers)
-    game = Game("map.txt", "locations.txt", "items.txt", "puzzle.txt", 2, 3, 8, 0, 13, 0)
+    game = new_game(TextRenderer(buffered=True))
     background = background_information("background.txt")
+    play_game(game, background)
+    while read_line(game) == "yes":
+        game.reset()
+        play_game(game, background)
+
+
+def read_line(game, prompt=""):
+    """
+    Writes out everything the game has emitted and the prompt, then reads a line of input.
+    :param game: a Game object
+    :param prompt: (Optional) string written just before reading, without a line ending
+    :return: string line of input
+    """
+    game.output.emit("prompt", prompt)
+    game.output.flush()
+    return input()
+
+
+def play_game(game, background):
+    """
+    Plays the game through once, then asks whether to play again.
+    :param game: a Game object that has not been played yet
+    :param background: dictionary of game messages, as returned by background_information
+    :return: none
+    """
     # Start of Engine
-    direction_tuples = {"north": (0, -1), "south": (0, 1), "west": (-1, 0), "east": (1, 0)}
-    print(background["INTRODUCTION"])
+    game.say(background["INTRODUCTION"])
     game.exam_time()
-    print()
+    game.say()
     game.move(0, 0)
+    turns = 0
+    commands = []
     while not game.over:
         game.time()
-        print("What do you want to do?")
+        game.say("What do you want to do?")
         allowed = game.menu()
-        print()
-        choice = input("Enter action: ").lower()
-        print(choice)
-        if choice in allowed:
-            if choice.startswith("go"):
-                request = choice[3:]
-                displacement = direction_tuples[request]
-                game.move(*displacement)
-            elif choice == "buy":
-                game.buy()
-                print()
-            elif choice == "look":
-                game.look()
-            elif choice == "inventory":
-                game.inventory()
-                print()
-            elif choice == "score":
-                game.score()
-            elif choice == "search":
-                game.search()
-                print()
-            elif choice == "take":
-                print("Take what?")
-                name = input()
-                game.take(name)
-                print()
-            elif choice == "drop":
-                game.inventory()
-                print("Drop what?")
-                name = input()
-                game.drop(name)
-                print()
-            elif choice == "quit":
-                print("Game over!")
-                break
+        game.say()
+        if not commands:
+            commands = split_commands(read_line(game, "Enter action: "))
+        command = commands.pop(0)
+        turns += 1
+        game.say(command.lower())
+        action, name = resolve(command, allowed)
+        if action is None:
+            game.say("That action is not allowed here!")
+            game.say()
+            # The commands after it may have counted on it, so they are dropped
+            commands = []
+        elif action == "quit":
+            game.say("Game over!")
+            break
         else:
-            print("That action is not allowed here!")
-            print()
+            if action in ITEM_ACTIONS and not name:
+                ask_item(game, action)
+                name = read_line(game)
+                commands = []
+            dispatch(game, action, name)
         game.check()
     else:  # no break
         if game.lost:
-            print(background["DEFEAT"])
+            game.say(background["DEFEAT"])
         else:
             if game.exam():
-                print(background["VICTORY"])
+                game.say(background["VICTORY"])
             else:
-                print(background["DEFEAT"])
+                game.say(background["DEFEAT"])
     game.score()
-    print("Do you want to play again?")
-    print("yes : no")
-    user_ultimatum = input()
-    if user_ultimatum == "yes":
-        run_game()
+    if metrics.active is not None:
+        metrics.active.end_session(turns)
+    game.say("Do you want to play again?")
+    game.say("yes : no")
 
 
 if __name__ == "__main__":
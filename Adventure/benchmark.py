@@ -0,0 +1,262 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from adventure import Game, background_information
+from events import TextRenderer, NullStream
+from game_data import World, Exam
+from generator import generate
+from state import fork
+
+LOADERS = ("load_map", "load_locations", "load_items")
+
+
+class TimedWorld(World):
+    def __init__(self, mapdata, locdata, itemdata):
+        """
+        Creates a World as usual, recording how long each loader takes.
+        :return: a TimedWorld object with a dictionary of seconds keyed by loader name in self.timings
+        """
+        self.timings = {}
+        World.__init__(self, mapdata, locdata, itemdata)
+
+    def load_map(self, filename):
+        start = time.perf_counter()
+        result = World.load_map(self, filename)
+        self.timings["load_map"] = time.perf_counter() - start
+        return result
+
+    def load_locations(self, filename):
+        start = time.perf_counter()
+        World.load_locations(self, filename)
+        self.timings["load_locations"] = time.perf_counter() - start
+
+    def load_items(self, filename):
+        start = time.perf_counter()
+        World.load_items(self, filename)
+        self.timings["load_items"] = time.perf_counter() - start
+
+
+def per_call(action, calls, repeats=3):
+    """
+    Times action, keeping the best of several runs to reduce noise.
+    :param action: function of no arguments
+    :param calls: integer number of times to call action in each run
+    :param repeats: integer number of runs
+    :return: float seconds per call
+    """
+    best = None
+    for run in range(repeats):
+        start = time.perf_counter()
+        for call in range(calls):
+            action()
+        elapsed = (time.perf_counter() - start) / calls
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def bench_loaders(files):
+    """
+    :param files: list of the names of the map, location, item and exam files
+    :return: dictionary of seconds keyed by loader name
+    """
+    world = TimedWorld(*files[:3])
+    timings = dict(world.timings)
+    start = time.perf_counter()
+    Exam(files[3])
+    timings["load_exam"] = time.perf_counter() - start
+    return timings
+
+
+def bench_turns(game, calls):
+    """
+    Times the methods that run every turn, on copies of game.
+    :param game: a Game object that has not been played yet, it is not modified
+    :param calls: integer number of calls to time for each method
+    :return: dictionary of seconds per call keyed by method name
+    """
+    timings = {}
+    world = game.world
+    # A location with a neighbour, to move back and forth between
+    position = game.player.get_position()
+    step = (0, 0)
+    for candidate in world.locations:
+        for x_dist, y_dist in ((1, 0), (0, 1), (-1, 0), (0, -1)):
+            if world.is_location((candidate[0] + x_dist, candidate[1] + y_dist)):
+                position, step = candidate, (x_dist, y_dist)
+                break
+        else:
+            continue
+        break
+    # Text is still formatted, as it would be for a player, but thrown away
+    output = TextRenderer(NullStream())
+    played = fork(game)
+    played.set_output(output)
+    played.player.x, played.player.y = position
+    timings["menu"] = per_call(played.menu, calls)
+    timings["move"] = per_call(lambda: (played.move(*step), played.move(-step[0], -step[1])), calls // 2) / 2
+    timings["search"] = per_call(played.search, calls)
+    played = fork(game)
+    played.set_output(output)
+    if world.items:
+        played.player.x, played.player.y = world.starts[0]
+        name = world.items[0].get_name()
+        timings["take_drop"] = per_call(lambda: (played.take(name), played.drop(name)), calls // 2) / 2
+    # check does the most work when the player carries everything, away from the target
+    played = fork(game)
+    played.set_output(output)
+    for item, start in zip(world.items, world.starts):
+        played.player.add_item(played.world_state.pop_item(start, item.get_name()))
+    timings["check"] = per_call(played.check, calls)
+    return timings
+
+
+def bench_memory(game, files, sessions):
+    """
+    Measures the memory of the World that every session of a game shares, and of what each session adds to it.
+    :param game: a Game object that has not been played yet, it is not modified
+    :param files: list of the names of the map, location and item files
+    :param sessions: integer number of sessions to average over
+    :return: dictionary of bytes keyed by benchmark name
+    """
+    memory = {}
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    world = World(*files[:3])
+    memory["world_memory"] = tracemalloc.get_traced_memory()[0] - before
+    del world
+    before = tracemalloc.get_traced_memory()[0]
+    world = World(*files[:3], compressed=True)
+    memory["compressed_world_memory"] = tracemalloc.get_traced_memory()[0] - before
+    del world
+    before = tracemalloc.get_traced_memory()[0]
+    played = [fork(game) for session in range(sessions)]
+    memory["session_memory"] = (tracemalloc.get_traced_memory()[0] - before) // sessions
+    tracemalloc.stop()
+    return memory
+
+
+def bench_world(name, files, start, calls, sessions):
+    """
+    Runs every benchmark on one world.
+    :param name: string label of the world
+    :param files: list of the names of the map, location, item and exam files
+    :param start: tuple (x, y) of the starting position
+    :param calls: integer number of calls to time for each per-turn method
+    :param sessions: integer number of sessions to measure the memory of
+    :return: list of result dictionaries
+    """
+    game = Game(files[0], files[1], files[2], files[3], start[0], start[1], 8, 0, 13, 0)
+    world = game.world
+    details = {"world": name, "cells": sum(len(row) for row in world.map), "locations": len(world.locations),
+               "items": world.get_total_items()}
+    results = []
+    for benchmark, seconds in bench_loaders(files).items():
+        results.append(dict(details, benchmark=benchmark, kind="load", seconds=seconds))
+    for benchmark, seconds in bench_turns(game, calls).items():
+        results.append(dict(details, benchmark=benchmark, kind="turn", seconds=seconds))
+    for benchmark, size in bench_memory(game, files, sessions).items():
+        results.append(dict(details, benchmark=benchmark, kind="memory", bytes=size))
+    return results
+
+
+def commit():
+    """
+    :return: string hash of the checked out git commit, or None if it cannot be found
+    """
+    try:
+        output = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def show(result):
+    """
+    :param result: result dictionary
+    :return: string of the time or memory measured, with its unit
+    """
+    if "bytes" in result:
+        return "{0:>14.1f} kB".format(result["bytes"] / 1e3)
+    return "{0:>14.3f} us".format(result["seconds"] * 1e6)
+
+
+def run(sides, calls, sessions, output):
+    """
+    Benchmarks the bundled world and a generated square world for each side length, and writes the results.
+    :param sides: list of integer side lengths of the generated worlds
+    :param calls: integer number of calls to time for each per-turn method
+    :param sessions: integer number of sessions to measure the memory of
+    :param output: string that gives name of the JSON file to write
+    :return: none
+    """
+    results = []
+    start = time.perf_counter()
+    background_information("background.txt")
+    results.append({"world": "bundled", "benchmark": "background_information", "kind": "load",
+                    "seconds": time.perf_counter() - start})
+    bundled = ["map.txt", "locations.txt", "items.txt", "puzzle.txt"]
+    results += bench_world("bundled", bundled, (2, 3), calls, sessions)
+    for side in sides:
+        with tempfile.TemporaryDirectory() as directory:
+            target = generate(directory, side, side, items=side, description=300)
+            files = [os.path.join(directory, name) for name in bundled]
+            results += bench_world("generated {0}x{0}".format(side), files, target, calls, sessions)
+    report = {"commit": commit(), "python": platform.python_version(), "results": results}
+    output_file = open(output, "w")
+    json.dump(report, output_file, indent=1)
+    output_file.close()
+    for result in results:
+        print("{0:<20}{1:<24}{2}".format(result["world"], result["benchmark"], show(result)))
+
+
+def compare(before, after):
+    """
+    Prints how each benchmark changed between two result files.
+    :param before: string that gives name of the earlier JSON file
+    :param after: string that gives name of the later JSON file
+    :return: none
+    """
+    reports = []
+    for filename in (before, after):
+        report_file = open(filename, "r")
+        reports.append(json.load(report_file))
+        report_file.close()
+    earlier = {(result["world"], result["benchmark"]): result for result in reports[0]["results"]}
+    print("{0} -> {1}".format(reports[0]["commit"], reports[1]["commit"]))
+    for result in reports[1]["results"]:
+        key = (result["world"], result["benchmark"])
+        if key in earlier:
+            unit = "bytes" if "bytes" in result else "seconds"
+            print("{0:<20}{1:<24}{2}{3}{4:>8.2f}x".format(key[0], key[1], show(earlier[key]), show(result),
+                                                         earlier[key][unit] / result[unit]))
+
+
+def main():
+    """
+    Command line entry point.
+        python benchmark.py [--sides 30 300 1000] [--calls N] [--sessions N] [--output FILE]   runs the benchmarks
+        python benchmark.py --compare BEFORE AFTER                                             compares two result files
+    :return: none
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the loaders and the per-turn methods.")
+    parser.add_argument("--sides", type=int, nargs="*", default=[30, 300, 1000])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    arguments = parser.parse_args()
+    if arguments.compare:
+        compare(*arguments.compare)
+    else:
+        run(arguments.sides, arguments.calls, arguments.sessions, arguments.output)
+
+
+if __name__ == "__main__":
+    main()
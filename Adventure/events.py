@@ -0,0 +1,138 @@
+import sys
+
+# How each kind of event reads as text, given the event's arguments. Together they reproduce what the game
+# used to print() directly, byte for byte.
+FORMATS = {
+    "text": lambda text: text + "\n",
+    "prompt": lambda text: text,
+    "time": lambda time: time + "\n",
+    "exam_time": lambda time: "Your exam is at " + time + "\n",
+    "menu": lambda directions, actions: " : ".join(directions) + "\n" + " : ".join(actions) + "\n",
+    "location": lambda name, description: name.upper() + "\n" + description + "\n",
+    "description": lambda description: description + "\n",
+    "found": lambda names: "You managed to find the following items:\n" + ", ".join(names) + "\n",
+    "nothing_found": lambda: "There is nothing here!\n",
+    "inventory": lambda names: ", ".join(names) + "\n",
+    "no_items": lambda: "You have no items!\n",
+    "took": lambda name: "Took " + name + "\n",
+    "no_such_item": lambda name: "There is no item " + name + "\n",
+    "dropped": lambda name: "Dropped " + name + "\n",
+    "not_carried": lambda name: "You do not have item " + name + "\n",
+    "score": lambda score: "Your score is {0}\n\n".format(score),
+    "coffee": lambda: "Bought coffee. Boy that was good!\n",
+    "exam_start": lambda: "Your exam is about to begin!\n\n",
+    "question": lambda number, text: "QUESTION {0}\n{1}\n".format(number, text),
+    "answer_prompt": lambda: "Enter answer below:\n",
+}
+
+
+def render(kind, *args):
+    """
+    :param kind: string kind of event, a key of FORMATS
+    :param args: the arguments of the event
+    :return: string of the text the event reads as
+    """
+    return FORMATS[kind](*args)
+
+
+class TextRenderer:
+    def __init__(self, stream=None, buffered=False):
+        """
+        Creates a new TextRenderer, which turns events into the game's text.
+        :param stream: (Optional) file-like object to write to. If not given, whatever sys.stdout is at the time.
+        :param buffered: (Optional) bool value, True to hold the text until flush is called, so that a whole turn
+            is written at once. If False, every event is written as soon as it is emitted.
+        :return: a TextRenderer object
+        """
+        self.stream = stream
+        self.buffered = buffered
+        self.pending = []
+
+    def emit(self, kind, *args):
+        """
+        Records an event.
+        :param kind: string kind of event, a key of FORMATS
+        :param args: the arguments of the event
+        :return: none
+        """
+        if self.buffered:
+            self.pending.append(FORMATS[kind](*args))
+        else:
+            (self.stream or sys.stdout).write(FORMATS[kind](*args))
+
+    def pop_text(self):
+        """
+        Takes the text held so far without writing it.
+        :return: string of the text of every event since the last flush
+        """
+        text = "".join(self.pending)
+        self.pending = []
+        return text
+
+    def flush(self):
+        """
+        Writes the text held so far in a single write.
+        :return: none
+        """
+        if self.pending:
+            stream = self.stream or sys.stdout
+            stream.write(self.pop_text())
+            stream.flush()
+
+
+class NullRenderer:
+    def emit(self, kind, *args):
+        """
+        Ignores the event, without formatting it.
+        :return: none
+        """
+        pass
+
+    def flush(self):
+        """
+        Does nothing, there is never anything held.
+        :return: none
+        """
+        pass
+
+
+class NullStream:
+    def write(self, text):
+        """
+        Discards the text written to the stream.
+        :param text: string that would have been written
+        :return: the number of characters "written"
+        """
+        return len(text)
+
+    def flush(self):
+        """
+        Does nothing, there is never anything buffered.
+        :return: none
+        """
+        pass
+
+
+class EventLog:
+    def __init__(self):
+        """
+        Creates a new EventLog, which keeps the events themselves for programs that read them rather than text.
+        :return: an EventLog object with a list of (kind, arguments) tuples in self.events
+        """
+        self.events = []
+
+    def emit(self, kind, *args):
+        """
+        Records an event.
+        :param kind: string kind of event, a key of FORMATS
+        :param args: the arguments of the event
+        :return: none
+        """
+        self.events.append((kind, args))
+
+    def flush(self):
+        """
+        Does nothing, the events stay in self.events.
+        :return: none
+        """
+        pass
@@ -0,0 +1,243 @@
+import argparse
+import itertools
+import random
+import time
+
+from adventure import DIRECTIONS, ACTIONS, new_game
+from events import NullRenderer
+from replay import play
+from state import fork
+
+# Words that are never actions, for commands that must be turned down
+NONSENSE = ("", "  ", "go", "go up", "s", "look around", "takes", "xyzzy", "GO NORTH NOW", ";;", "drops")
+
+
+class Watch:
+    def __init__(self, game):
+        """
+        Creates a new Watch: a model of where the player should be and what they should have scored, kept apart from
+        the engine and updated from nothing but the actions carried out, and the invariants the engine must keep
+        after every command. Called as a replay.play watch, it raises AssertionError as soon as one is broken.
+        The invariants are:
+            position: the player is always at a location, never on a wall or off the map
+            moves: only moves move the player, by one step, or none if the way is blocked
+            score: the score is the points of the locations visited for the first time and of the items held
+            time: only moves, searches and coffee take time
+            items: every item of the world is held or at a location, exactly once
+            blocked: the location that stands for walls is never changed
+            win: the game is won exactly when every item is held at its target (checked by a full scan)
+        :param game: a Game object that has not been played yet
+        :return: a Watch object
+        """
+        world = game.world
+        # Play starts with a move onto the starting location, as run_game does
+        self.position = game.player.get_position()
+        self.visited = {self.position}
+        self.travel = world.get_location(self.position).get_points()
+        self.moves = 1
+        self.clock = game.statistics.clock
+        self.blocked = (world.blocked.get_name(), world.blocked.get_points(), world.blocked.has_coffee())
+        self.items = sorted(id(item) for item in world.items)
+        self.steps = 0
+
+    def __call__(self, game, action):
+        """
+        Updates the model with one action, then checks every invariant against game.
+        :param game: the Game object the action was carried out on
+        :param action: string action, or None if the command was not allowed
+        :return: none
+        """
+        world = game.world
+        player = game.player
+        statistics = game.statistics
+        self.steps += 1
+        method = ACTIONS[action][0] if action is not None else None
+        if method == "move":
+            x_dist, y_dist = ACTIONS[action][1]
+            target = (self.position[0] + x_dist, self.position[1] + y_dist)
+            if world.is_location(target):
+                if target not in self.visited:
+                    self.travel += world.get_location(target).get_points()
+                self.visited.add(target)
+                self.position = target
+            else:
+                self.travel += world.blocked.get_points()
+            self.moves += 1
+        elif method not in ("search", "buy") and statistics.clock != self.clock:
+            raise AssertionError("time: {0} took {1} minutes".format(action, statistics.clock - self.clock))
+        self.clock = statistics.clock
+        position = player.get_position()
+        if not world.is_location(position):
+            raise AssertionError("position: the player is at {0}, which is not a location".format(position))
+        if position != self.position or statistics.moves != self.moves:
+            raise AssertionError("moves: the player is at {0} after {1} moves, not at {2} after {3}".format(
+                position, statistics.moves, self.position, self.moves))
+        held = list(player.get_inventory())
+        score = self.travel + sum(item.get_points() for item in held)
+        if statistics.get_score() != score:
+            raise AssertionError("score: the score is {0}, not {1}".format(statistics.get_score(), score))
+        found = [id(item) for item in held]
+        for where, items in game.world_state.items.items():
+            if not world.is_location(where):
+                raise AssertionError("items: there are items at {0}, which is not a location".format(where))
+            found += [id(item) for item in items]
+        if len(found) != world.get_total_items() or sorted(found) != self.items:
+            raise AssertionError("items: {0} items are held or placed, of {1}".format(len(found),
+                                                                                    world.get_total_items()))
+        if (world.blocked.get_name(), world.blocked.get_points(), world.blocked.has_coffee()) != self.blocked:
+            raise AssertionError("blocked: the blocked location was changed")
+        won = len(held) == world.get_total_items() and all(item.target == position for item in held)
+        if game.over != (won or statistics.is_past_exam()) or game.lost != statistics.is_past_exam():
+            raise AssertionError("win: the game is {0}over{1}, with every item at its target {2}".format(
+                "" if game.over else "not ", " and lost" if game.lost else "", won))
+
+
+def random_lines(rng, game):
+    """
+    Makes up an endless stream of input lines, mostly commands that may or may not be allowed where the player
+    happens to be: whole, abbreviated, in odd case or with an item name, some on one line separated by semicolons,
+    and some that are never allowed. A few lines are bare item names, for a take or drop that asked for one.
+    :param rng: random.Random object
+    :param game: a Game object, whose item names are used
+    :return: generator of string lines
+    """
+    names = [item.get_name() for item in game.world.items] + ["", "nothing", game.world.items[0].get_name().upper()]
+    actions = [action for action in ACTIONS if not action.startswith("go ")]
+    moves = ["go " + direction for direction in DIRECTIONS]
+    while True:
+        commands = []
+        for command in range(1 if rng.random() < 0.8 else rng.randint(2, 5)):
+            roll = rng.random()
+            if roll < 0.55:
+                command = rng.choice(moves)
+            elif roll < 0.85:
+                command = rng.choice(actions)
+            elif roll < 0.95:
+                commands.append(rng.choice(NONSENSE))
+                continue
+            else:
+                commands.append(rng.choice(names))
+                continue
+            if rng.random() < 0.2:
+                command = " ".join(word[:rng.randint(1, len(word))] for word in command.split())
+            if rng.random() < 0.1:
+                command = command.upper()
+            if command.startswith(("t", "d", "T", "D")) and rng.random() < 0.7:
+                command += " " + rng.choice(names)
+            commands.append(command)
+        yield "; ".join(commands)
+
+
+def run(template, lines):
+    """
+    Plays lines against a fresh copy of template under a Watch, until the session ends or the lines run out.
+    :param template: a Game object that has not been played yet, it is not modified
+    :param lines: iterable of string lines. Lines are only made as they are read, if it is a generator.
+    :return: tuple of the integer number of commands watched, the string invariant that was broken with what broke
+        it, or "crash" with the exception if the game raised one (None if neither), and the list of the lines read
+    """
+    game = fork(template)
+    game.set_output(NullRenderer())
+    watch = Watch(game)
+    read = []
+
+    def record():
+        for line in lines:
+            read.append(line)
+            yield line
+
+    try:
+        play(game, record(), watch)
+    except AssertionError as error:
+        return watch.steps, str(error), read
+    except Exception as error:
+        return watch.steps, "crash: {0!r}".format(error), read
+    return watch.steps, None, read
+
+
+def shrink(template, lines, failure):
+    """
+    Cuts a stream down to a minimal one that still breaks the same invariant: first whole lines, in halves, quarters
+    and so on down to single lines, then single commands from lines that hold many.
+    :param template: a Game object that has not been played yet, it is not modified
+    :param lines: list of string lines that break an invariant
+    :param failure: string failure returned by run for lines
+    :return: list of string lines that break it, no line or command of which can be left out
+    """
+    invariant = failure.split(":")[0]
+
+    def fails(candidate):
+        steps, found, read = run(template, candidate)
+        return found is not None and found.split(":")[0] == invariant
+
+    size = len(lines) // 2
+    while size:
+        start = 0
+        while start < len(lines):
+            candidate = lines[:start] + lines[start + size:]
+            if fails(candidate):
+                lines = candidate
+            else:
+                start += size
+        size //= 2
+    for number in range(len(lines)):
+        commands = lines[number].split(";")
+        position = 0
+        while len(commands) > 1 and position < len(commands):
+            candidate = commands[:position] + commands[position + 1:]
+            if fails(lines[:number] + [";".join(candidate).strip()] + lines[number + 1:]):
+                commands = candidate
+            else:
+                position += 1
+        lines[number] = ";".join(commands).strip()
+    return lines
+
+
+def fuzz(template, streams, length, seed=0):
+    """
+    Plays many random streams, stopping at the first that breaks an invariant.
+    :param template: a Game object that has not been played yet, it is not modified
+    :param streams: integer number of streams
+    :param length: integer number of lines in each stream at most, as a session may end sooner
+    :param seed: (Optional) integer seed of the random number generator
+    :return: tuple of the integer number of commands watched, the float seconds it took, and either None or a
+        tuple of the string failure and the shrunk stream that causes it
+    """
+    rng = random.Random(seed)
+    steps = 0
+    start = time.perf_counter()
+    for stream in range(streams):
+        watched, failure, lines = run(template, itertools.islice(random_lines(rng, template), length))
+        steps += watched
+        if failure is not None:
+            elapsed = time.perf_counter() - start
+            return steps, elapsed, (failure, shrink(template, lines, failure))
+    return steps, time.perf_counter() - start, None
+
+
+def main():
+    """
+    Command line entry point, see python fuzz.py --help.
+    :return: none
+    """
+    parser = argparse.ArgumentParser(description="Play random commands against the game, checking its invariants.")
+    parser.add_argument("--streams", type=int, default=2000)
+    parser.add_argument("--length", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="failure.txt", help="file to write the shrunk stream of a failure to")
+    arguments = parser.parse_args()
+    steps, elapsed, found = fuzz(new_game(), arguments.streams, arguments.length, arguments.seed)
+    print("{0} commands in {1:.1f}s, {2:.0f} commands/s".format(steps, elapsed, steps / elapsed))
+    if found is None:
+        print("No invariant was broken")
+    else:
+        failure, lines = found
+        print("Broken:", failure)
+        output_file = open(arguments.output, "w")
+        output_file.write("".join(line + "\n" for line in lines))
+        output_file.close()
+        print("{0} lines written to {1}".format(len(lines), arguments.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,30 @@
+import array
+import collections
+import math
+import mmap
+import re
+import threading
+import zlib
+
+from events import TextRenderer
+
+# Bits of an exit mask, one per direction, in the order the menu lists them
+NORTH, SOUTH, WEST, EAST = 1, 2, 4, 8
+STEPS = ((NORTH, (0, -1)), (SOUTH, (0, 1)), (WEST, (-1, 0)), (EAST, (1, 0)))
+# The direction actions of every possible exit mask
+EXIT_NAMES = tuple(tuple(name for bit, name in ((NORTH, "go north"), (SOUTH, "go south"), (WEST, "go west"),
+                                               (EAST, "go east")) if mask & bit) for mask in range(16))
+# How far apart two numeric answers may be, relative to their size, and still count as the same answer
+TOLERANCE = 1e-9
+# How a numeric answer is written: digits, with an optional sign and decimal part
+NUMBER = re.compile(r"[+-]?\d+(\.\d+)?", re.ASCII)
+# Decompressed descriptions kept by a CompressedDescriptions, and the most text its zlib dictionary is sampled from
+CACHE_SIZE = 64
+DICTIONARY_SIZE = 8192
+
+
 class World:
-    def __init__(self, mapdata, locdata, itemdata):
+    def __init__(self, mapdata, locdata, itemdata, snapshot=None, lazy=False, compressed=False):
         """
         Creates a new World object, with a map, and data about every location and item in this game world.
         :param mapdata: name of text file containing map data in grid format
@@ -11,16 +36,45 @@ class World:
             Where each number represents a different location, and -1 represents an invalid, inaccessible space.
         :param locdata: name of text file containing location data (format left up to you)
         :param itemdata: name of text file containing item data (format left up to you)
+        :param snapshot: (Optional) dictionary read from a compiled world snapshot (see snapshot.py).
+            If given, the world is restored from it and the text files are not read.
+        :param lazy: (Optional) bool value, True to memory-map locdata and keep only the offsets of each location's
+            descriptions, decoding them when they are asked for. Ignored when snapshot is given.
+        :param compressed: (Optional) bool value, True to keep location descriptions zlib-compressed in memory,
+            decompressing them when they are asked for (see CompressedDescriptions). Ignored when they are
+            memory-mapped.
         :return: A world object containing a list or lists representing the maps and a dictionary of locations
             keyed to a tuple representing its position. The
+        Once loaded, a World never changes, so every game of the same world can share one. What changes while a
+        game is played (which locations have been visited and where the items are) is kept in a WorldState.
         """
         self.map = []
+        self.coordinates = {}
+        self.numbers = {}
         self.locations = {}
         self.blocked = None
+        self.descriptions = None
+        self.items = []
+        self.starts = []
         self.total_items = 0
-        self.load_map(mapdata)
-        self.load_locations(locdata)
-        self.load_items(itemdata)
+        self.exits = {}
+        # Position of every location, in index order
+        self.positions = []
+        if snapshot is None:
+            self.load_map(mapdata)
+            if lazy:
+                self.map_locations(locdata)
+            else:
+                self.load_locations(locdata)
+            self.load_items(itemdata)
+        else:
+            self.load_snapshot(snapshot)
+        if compressed and self.descriptions is None:
+            self.compress_descriptions()
+        for index, (position, location) in enumerate(self.locations.items()):
+            location.index = index
+            self.positions.append(position)
+        self.find_exits()
 
     def load_map(self, filename):
         """
@@ -29,14 +83,20 @@ class World:
             3 -1 4
         becomes [['1','2','5'], ['3','-1','4']] OR [[1,2,5], [3,-1,4]]
         RETURN THIS NEW NESTED LIST.
+        Also indexes every location number to its position (self.coordinates) and every position to its
+        location number (self.numbers), so that neither has to be found by scanning the map.
         :param filename: string that gives name of text file in which map data is located
         :return: return nested list of strings/integers representing map of game world as specified above
         """
         map_file = open(filename, "r")
-        for line in map_file:
+        for y_value, line in enumerate(map_file):
             string_row = line.split()
             int_row = [int(number) for number in string_row]
             self.map.append(int_row)
+            for x_value, number in enumerate(int_row):
+                if number >= 0:
+                    self.coordinates.setdefault(number, (x_value, y_value))
+                    self.numbers[(x_value, y_value)] = number
         map_file.close()
         return self.map
 
@@ -83,12 +143,52 @@ class World:
             line = location_file.readline().rstrip()
         location_file.close()
 
+    def map_locations(self, filename):
+        """
+        Same as load_locations, except that filename is memory-mapped and every location other than BLOCKED only
+        keeps the byte offsets of its short and long descriptions within it. The text is decoded from the mapping
+        by the Location when it is asked for, so it is only resident while it is being used.
+        :param filename: string that gives the name of the text file in which location data is located
+        :return: none
+        """
+        self.descriptions = MappedDescriptions(filename)
+        source = self.descriptions.map
+        blocked = source.readline().decode().rstrip()
+        points = int(source.readline())
+        coffee = bool(source.readline().rstrip())
+        short_description = source.readline().decode()
+        description_list = []
+        line = source.readline().decode()
+        while line != "END":
+            description_list.append(line)
+            line = source.readline().decode().rstrip()
+        long_description = " ".join(description_list)
+        self.blocked = Location(blocked, points, coffee, short_description, long_description)
+        source.readline()
+        line = source.readline().rstrip()
+        while line:
+            number = int(line.strip(b"LOCATION "))
+            position = self.get_coordinates(number)
+            name = source.readline().decode().rstrip()
+            points = int(source.readline())
+            coffee = bool(source.readline().rstrip())
+            short_start = source.tell()
+            source.readline()
+            long_start = source.tell()
+            # The long description runs up to the next line that is exactly END
+            long_end = source.find(b"\nEND\n", long_start - 1) + 1
+            source.seek(long_end + len(b"END\n"))
+            self.locations[position] = Location(name, points, coffee, (short_start, long_start),
+                                                (long_start, long_end), self.descriptions)
+            # Clean up!
+            source.readline()
+            line = source.readline().rstrip()
+
     def load_items(self, filename):
         """
         Makes a new Item object for each item in filename
-        Store all Item objects in a position in a list within a Location object corresponding
-        to that position.
-        Sets self.total_items equal to the number of items in filename
+        Sets self.total_items equal to the number of items in filename, and lists every Item in file order
+        in self.items, with the position it starts at in self.starts
         :param filename: string that gives the name of the text file in which item data is located
         :return: none
         """
@@ -103,7 +203,9 @@ class World:
             target = self.get_coordinates(target_number)
             description = item_file.readline().rstrip()
             # Add item
-            self.locations[position].add_item(Item(name, points, target, description))
+            item = Item(name, points, target, description)
+            self.items.append(item)
+            self.starts.append(position)
             self.total_items += 1
             # Clean up!
             item_file.readline()
@@ -111,6 +213,63 @@ class World:
             line = item_file.readline().rstrip()
         item_file.close()
 
+    def load_snapshot(self, snapshot):
+        """
+        Restores the map, locations and items from a compiled world snapshot instead of the text files.
+        :param snapshot: dictionary with the "map", "coordinates", "numbers", "blocked", "locations" and "items"
+            records written by snapshot.compile_snapshot
+        :return: none
+        """
+        self.map = snapshot["map"]
+        self.coordinates = snapshot["coordinates"]
+        self.numbers = snapshot["numbers"]
+        self.blocked = Location(*snapshot["blocked"])
+        for x_value, y_value, name, points, coffee, short_description, long_description in snapshot["locations"]:
+            location = Location(name, points, coffee, short_description, long_description)
+            self.locations[(x_value, y_value)] = location
+        for x_value, y_value, name, points, target, description in snapshot["items"]:
+            item = Item(name, points, target, description)
+            self.items.append(item)
+            self.starts.append((x_value, y_value))
+            self.total_items += 1
+
+    def compress_descriptions(self, capacity=CACHE_SIZE):
+        """
+        Moves the descriptions of every location other than BLOCKED into a CompressedDescriptions, leaving each
+        Location with only their keys in it.
+        :param capacity: (Optional) integer number of decompressed descriptions to cache
+        :return: none
+        """
+        locations = list(self.locations.values())
+        # The dictionary is sampled from the descriptions themselves, as those are what it will be matched against
+        sample = []
+        size = 0
+        for location in locations:
+            if size >= DICTIONARY_SIZE:
+                break
+            sample.append(location.short + location.long)
+            size += len(sample[-1])
+        store = CompressedDescriptions("".join(sample).encode()[:DICTIONARY_SIZE], capacity)
+        for location in locations:
+            location.short = store.add(location.short)
+            location.long = store.add(location.long)
+            location.store = store
+        self.descriptions = store
+
+    def find_exits(self):
+        """
+        Works out once which neighbours of every location are locations too, so that moves never have to be looked
+        up again. Stores a mask of NORTH, SOUTH, WEST and EAST bits for every position in self.exits.
+        :return: none
+        """
+        locations = self.locations
+        for x_pos, y_pos in locations:
+            mask = 0
+            for bit, (x_dist, y_dist) in STEPS:
+                if (x_pos + x_dist, y_pos + y_dist) in locations:
+                    mask |= bit
+            self.exits[(x_pos, y_pos)] = mask
+
     def get_total_items(self):
         """
         :return: integer number of the total items
@@ -135,10 +294,21 @@ class World:
         :return: A tuple representing the coordinates of the location.
         Given a number, returns a tuple representing its position in the world map.
         """
-        for y_value, row in enumerate(self.map):
-            if index in row:
-                x_value = row.index(index)
-                return x_value, y_value
+        return self.coordinates.get(index)
+
+    def get_number(self, position):
+        """
+        :param position: Tuple representation of a position on the map
+        :return: The integer location number at position, or None if position is a wall or off the map.
+        """
+        return self.numbers.get(position)
+
+    def get_position(self, index):
+        """
+        :param index: integer index of a location, as in Location.index
+        :return: A tuple representing the position of the location with that index.
+        """
+        return self.positions[index]
 
     def is_location(self, position):
         """
@@ -154,38 +324,44 @@ class World:
         :param position: Tuple representation of a position on the map
         :return: List of directional actions available to a player at the given position
         """
-        directions = []
-        x_pos, y_pos = position
-        if self.is_location((x_pos, y_pos - 1)):
-            directions.append("go north")
-        if self.is_location((x_pos, y_pos + 1)):
-            directions.append("go south")
-        if self.is_location((x_pos - 1, y_pos )):
-            directions.append("go west")
-        if self.is_location((x_pos + 1, y_pos)):
-            directions.append("go east")
-        return directions
+        return list(EXIT_NAMES[self.get_exits(position)])
+
+    def get_exits(self, position):
+        """
+        :param position: Tuple representation of a position on the map
+        :return: integer mask of the NORTH, SOUTH, WEST and EAST bits of the directions a player can move in
+        """
+        mask = self.exits.get(position)
+        if mask is None:
+            # Only locations are indexed; anywhere else is worked out when asked
+            mask = 0
+            for bit, (x_dist, y_dist) in STEPS:
+                if self.is_location((position[0] + x_dist, position[1] + y_dist)):
+                    mask |= bit
+        return mask
 
 
 class Location:
-    def __init__(self, name, points, coffee, short_description, long_description):
+    def __init__(self, name, points, coffee, short_description, long_description, store=None):
         """
         Creates a new Location object, with a name, points, ability to purchase coffee, a short description
         of location and a long description of location
         :param name: string name of location
         :param points: int number of points received for visiting the location
         :param coffee: bool value, True if player can buy coffee, False if player cannot buy coffee
-        :param short_description: string short description of location
-        :param long_description: string long descriptino of location
-        :return: Location object containing a list of items in location
+        :param short_description: string short description of location, or its key in store
+        :param long_description: string long descriptino of location, or its key in store
+        :param store: (Optional) object whose text method turns the description keys back into strings
+            (e.g. MappedDescriptions). If not given, the descriptions are the strings themselves.
+        :return: Location object. Whether it has been visited and what items are in it are kept by a WorldState.
         """
-        self.visited = False
-        self.items = []
+        self.index = None
         self.name = name
         self.points = points
         self.coffee = coffee
         self.short = short_description
         self.long = long_description
+        self.store = store
 
     def get_name(self):
         """
@@ -194,42 +370,42 @@ class Location:
         """
         return self.name
 
-    def get_points(self):
+    def get_points(self, visited=False):
         """
         Gets the points given when visiting a location for the first time.
+        :param visited: (Optional) bool value, True if the player has visited the location before
         :return: Integer value of points if a player visits the location for the first time.
         If player has visited location before, returns integer value of 0
         """
-        if self.visited:
+        if visited:
             return 0
         else:
             return self.points
 
-    def get_item(self):
-        """
-        Gets the list of items available at the location
-        :return: A list of all items available at the location
-        """
-        return self.items
-
     def get_long_description(self):
         """
         Gets the long description of the location
         :return: A string of the long description of the location
         """
-        return self.long
+        if self.store is None:
+            return self.long
+        return self.store.text(self.long)
 
-    def get_description(self):
+    def get_description(self, visited=False):
         """
         Gets a description of the location depending on whether the player has
         visited the location or not
+        :param visited: (Optional) bool value, True if the player has visited the location before
         :return: A string with a description of the location
         Returns a short description if it has been visited by the player or a long one if it hasn't.
         """
-        if self.visited:
-            return self.short
+        if visited:
+            description = self.short
         else:
-            return self.long
+            description = self.long
+        if self.store is None:
+            return description
+        return self.store.text(description)
 
     def has_coffee(self):
         """
@@ -238,46 +414,270 @@ class Location:
         """
         return self.coffee
 
-    def has_item(self, name=None):
+
+class WorldState:
+    def __init__(self, world):
         """
-        :param name: (Optional) String representation of the name of an item
-        :return: If a name is given, returns True if the item name is in the location.
-        Returns False if the item name is not in the location.
-        If a name is not given, returns True if there are item(s) in the location.
-        Returns False if there are no items in the location.
+        Creates a new WorldState: the small part of a world that one game changes, kept apart from the World itself
+        so that any number of games can share the World. It holds one bit per location for whether it has been
+        visited, an Inventory for every position that has items in it, and the set of positions whose coffee
+        has been closed by an event (see timeline.py).
+        :param world: a World object
+        :return: a WorldState object with every location unvisited and every item where it starts
         """
+        self.world = world
+        self.visited = bytearray((len(world.locations) + 7) // 8)
+        self.items = {}
+        self.closed = set()
+        self.reset()
 
-        if name is None:
-            return bool(self.items)
-        for item in self.items:
-            if item.get_name() == name:
-                return True
+    def reset(self, held=()):
+        """
+        Puts the world back as it was loaded: no location visited and every item back where it started.
+        Nothing is read from the data files.
+        :param held: (Optional) iterable of the Item objects the player held. They are back where they started
+            with the rest, so they are only needed when the items are shared (see multiplayer.SharedWorldState).
+        :return: none
+        """
+        self.visited = bytearray(len(self.visited))
+        self.items = {}
+        self.closed = set()
+        for item, position in zip(self.world.items, self.world.starts):
+            self.add_item(position, item)
+
+    def copy(self):
+        """
+        :return: a new WorldState of the same World in the same state, that can be changed without affecting this one
+        """
+        duplicate = WorldState.__new__(WorldState)
+        duplicate.world = self.world
+        duplicate.visited = self.visited[:]
+        duplicate.items = {position: items.copy() for position, items in self.items.items()}
+        duplicate.closed = set(self.closed)
+        return duplicate
+
+    def is_visited(self, position):
+        """
+        :param position: Tuple representation of a position on the map
+        :return: True if the location at position has been visited before, False otherwise (or if there is none)
+        """
+        index = self.world.get_location(position).index
+        if index is None:
             return False
+        return bool(self.visited[index >> 3] >> (index & 7) & 1)
 
-    def visit(self):
+    def visit(self, position):
         """
-        Notes that the location has been visited before
+        Notes that the location at position has been visited before
+        :param position: Tuple representation of the position of a location on the map
         :return: none
         """
-        self.visited = True
+        index = self.world.get_location(position).index
+        self.visited[index >> 3] |= 1 << (index & 7)
+
+    def has_coffee(self, position):
+        """
+        :param position: Tuple representation of a position on the map
+        :return: True if coffee can be bought at position now, False otherwise
+        """
+        return bool(self.world.get_location(position).has_coffee()) and position not in self.closed
+
+    def get_items(self, position):
+        """
+        Gets the items available at a position
+        :param position: Tuple representation of a position on the map
+        :return: An Inventory of all items at position, in the order they were added
+        """
+        items = self.items.get(position)
+        if items is None:
+            return Inventory()
+        return items
 
-    def add_item(self, item):
+    def has_item(self, position, name=None):
         """
+        :param position: Tuple representation of a position on the map
+        :param name: (Optional) String representation of the name of an item
+        :return: If a name is given, returns True if the item name is at position, False otherwise.
+        If a name is not given, returns True if there are item(s) at position, False otherwise.
+        """
+        items = self.items.get(position)
+        if items is None:
+            return False
+        if name is None:
+            return True
+        return name in items
+
+    def add_item(self, position, item):
+        """
+        Puts the item at position.
+        :param position: Tuple representation of a position on the map
         :param item: An item object.
-        :return: None
-        Adds the item to the location.
+        :return: none
         """
-        self.items.append(item)
+        items = self.items.get(position)
+        if items is None:
+            items = self.items[position] = Inventory()
+        items.add(item)
 
-    def pop_item(self, name):
+    def pop_item(self, position, name):
         """
-        Returns item object with name, if it exists
+        Removes an item from position
+        :param position: Tuple representation of a position on the map
         :param name: The name of the item.
-        :return: The item object corresponding the specified name.
+        :return: The item object corresponding the specified name, or None if there is none at position
+        """
+        items = self.items.get(position)
+        if items is None:
+            return None
+        item = items.pop(name)
+        if not items:
+            del self.items[position]
+        return item
+
+
+class Inventory:
+    def __init__(self):
+        """
+        Creates a new, empty Inventory: a collection of Item objects that keeps the order they were added in
+        and finds, adds and removes them by name in constant time. Several items may share a name.
+        :return: an Inventory object
+        """
+        self.items = {}
+        self.names = {}
+        self.added = 0
+
+    def add(self, item):
+        """
+        Adds item after all the items already in the inventory.
+        :param item: An item object
+        :return: none
+        """
+        self.items[self.added] = item
+        self.names.setdefault(item.get_name(), {})[self.added] = None
+        self.added += 1
+
+    def pop(self, name):
+        """
+        Removes the earliest added item with the given name.
+        :param name: The name of the item
+        :return: The removed item object, or None if there is no item with that name
+        """
+        keys = self.names.get(name)
+        if not keys:
+            return None
+        key = next(iter(keys))
+        del keys[key]
+        if not keys:
+            del self.names[name]
+        return self.items.pop(key)
+
+    def copy(self):
+        """
+        Makes a new Inventory holding the same Item objects in the same order.
+        :return: an Inventory object that can be changed without affecting this one
+        """
+        duplicate = Inventory()
+        duplicate.items = self.items.copy()
+        duplicate.names = {name: keys.copy() for name, keys in self.names.items()}
+        duplicate.added = self.added
+        return duplicate
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __iter__(self):
+        return iter(self.items.values())
+
+    def __len__(self):
+        return len(self.items)
+
+
+class MappedDescriptions:
+    def __init__(self, filename):
+        """
+        Creates a read-only memory mapping of a location data file, from which descriptions are decoded on demand.
+        :param filename: string that gives the name of the text file in which location data is located
+        :return: a MappedDescriptions object
+        """
+        self.file = open(filename, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def text(self, span):
+        """
+        Decodes part of the mapped file.
+        :param span: tuple of the start and end byte offsets of the text
+        :return: the string between the two offsets
+        """
+        start, end = span
+        return self.map[start:end].decode()
+
+    def close(self):
+        """
+        Unmaps and closes the file. Locations that use it can no longer be described afterwards.
+        :return: none
+        """
+        self.map.close()
+        self.file.close()
+
+
+class CompressedDescriptions:
+    def __init__(self, dictionary, capacity=CACHE_SIZE):
+        """
+        Creates a new CompressedDescriptions: description text kept zlib-compressed, every description on its own
+        so any one can be decompressed alone, all of them packed one after the other in a single buffer.
+        Compression starts from a preset dictionary of text like the descriptions, so that even short ones shrink.
+        The capacity most recently used descriptions are also kept decompressed, so describing the same few
+        locations again and again costs a dictionary lookup.
+        :param dictionary: bytes of sample text for zlib to match against
+        :param capacity: (Optional) integer number of decompressed descriptions to cache
+        :return: a CompressedDescriptions object, with no descriptions in it
+        """
+        self.dictionary = dictionary
+        self.capacity = capacity
+        self.data = bytearray()
+        # Where each description starts in data, followed by where the last one ends
+        self.offsets = array.array("Q", [0])
+        self.cache = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def add(self, text):
         """
-        for index, item in enumerate(self.items):
-            if item.get_name() == name:
-                return self.items.pop(index)
+        :param text: string description
+        :return: integer key that text returns the description for
+        """
+        compressor = zlib.compressobj(9, zdict=self.dictionary)
+        self.data += compressor.compress(text.encode()) + compressor.flush()
+        self.offsets.append(len(self.data))
+        return len(self.offsets) - 2
+
+    def text(self, key):
+        """
+        :param key: integer key returned by add
+        :return: the string description
+        """
+        with self.lock:
+            text = self.cache.get(key)
+            if text is not None:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return text
+            self.misses += 1
+        decompressor = zlib.decompressobj(zdict=self.dictionary)
+        text = (decompressor.decompress(self.data[self.offsets[key]:self.offsets[key + 1]]) +
+                decompressor.flush()).decode()
+        with self.lock:
+            self.cache[key] = text
+            if len(self.cache) > self.capacity:
+                self.cache.popitem(last=False)
+        return text
+
+    def get_size(self):
+        """
+        :return: integer number of bytes of compressed text, dictionary included
+        """
+        return len(self.dictionary) + len(self.data) + len(self.offsets) * self.offsets.itemsize
 
 
 class Item:
@@ -325,14 +725,41 @@ class Statistics:
         :param current_minute: The current in-game minute
         :param exam_hour: The hour of the exam
         :param exam_minute:The minute the exam starts
-        :return: a Statistics object
+        :return: a Statistics object. The time is kept as a single count of minutes since midnight, in self.clock,
+            and the exam time in self.exam.
         """
         self.score = 0
         self.moves = 0
-        self.hour = current_hour
-        self.minute = current_minute
-        self.exam_hour = exam_hour
-        self.exam_minute = exam_minute
+        self.clock = current_hour * 60 + current_minute
+        self.exam = exam_hour * 60 + exam_minute
+
+    @property
+    def hour(self):
+        """
+        :return: integer hour of the current time
+        """
+        return self.clock // 60
+
+    @property
+    def minute(self):
+        """
+        :return: integer minute past the hour of the current time
+        """
+        return self.clock % 60
+
+    @property
+    def exam_hour(self):
+        """
+        :return: integer hour of the exam
+        """
+        return self.exam // 60
+
+    @property
+    def exam_minute(self):
+        """
+        :return: integer minute past the hour of the exam
+        """
+        return self.exam % 60
 
     def get_score(self):
         """
@@ -346,10 +773,7 @@ class Statistics:
         :param minutes: The number of minutes to add
         :return: none
         """
-        minute_buffer = self.minute + minutes
-        add_hour, minute = divmod(minute_buffer, 60)
-        self.hour += add_hour
-        self.minute = minute
+        self.clock += minutes
 
     def add_points(self, points):
         """
@@ -364,25 +788,21 @@ class Statistics:
         Determines whether the time has passed beyond the exam time
         :return: True if the current time is past the exam time, False otherwise
         """
-        if self.hour < self.exam_hour:
-            return False
-        if self.minute < self.exam_minute:
-            return False
-        return True
+        return self.clock >= self.exam
 
     def str_time(self):
         """
         Returns the current time in the format HH:MM
         :return: string representation of the current time
         """
-        return "{0}:{1:02}".format(self.hour, self.minute)
+        return "{0}:{1:02}".format(*divmod(self.clock, 60))
 
     def str_exam_time(self):
         """
         Returns the exam time in the format HH:MM
         :return: string representation of the exam time
         """
-        return "{0}:{1:02}".format(self.exam_hour, self.exam_minute)
+        return "{0}:{1:02}".format(*divmod(self.exam, 60))
 
     def move(self, points, tiredness):
         """
@@ -409,7 +829,7 @@ class Statistics:
         The wait time depend on how close the time is to the hour (when places are historically busier).
         :return: none
         """
-        distance = abs(30 - self.minute)
+        distance = abs(30 - self.clock % 60)
         if distance < 10:
             total_time = 10
         elif distance < 20:
@@ -420,16 +840,25 @@ class Statistics:
 
 
 class Exam:
-    def __init__(self, examdata):
+    def __init__(self, examdata, snapshot=None, output=None):
         """
         :param examdata: The file name of the exam questions and answers.
+        :param snapshot: (Optional) dictionary read from a compiled world snapshot (see snapshot.py).
+            If given, the questions are taken from it and examdata is not read.
+        :param output: (Optional) renderer that questions are emitted to (see events.py).
+            If not given, they are written to standard output.
         :return: An Exam object.
         """
+        self.output = output if output is not None else TextRenderer()
         self.exam = []
         self.number = 0
         self.correct = 0
         self.incorrect = 0
-        self.load_exam(examdata)
+        if snapshot is None:
+            self.load_exam(examdata)
+        else:
+            self.exam = [tuple(pair) for pair in snapshot["exam"]]
+        self.keys = [parse_answer(answer) for question, answer in self.exam]
 
     def load_exam(self, examdata):
         """
@@ -458,26 +887,99 @@ class Exam:
         :return: Poses a question.
         """
         pair = self.exam[self.number]
-        text = "QUESTION {0}\n{1}".format(self.number, pair[0])
-        print(text)
+        self.output.emit("question", self.number, pair[0])
 
-    def check_answer(self):
+    def check_answer(self, answer=None):
         """
         Gets input and checks if that is the answer to the current question.
         Updates number of correct and incorrect answers.
+        :param answer: (Optional) String answer to check instead of reading one from input
         :return: none
         """
-        pair = self.exam[self.number]
+        self.output.emit("answer_prompt")
+        if answer is None:
+            self.output.flush()
+            answer = input()
+        self.grade(answer)
+
+    def grade(self, answer):
+        """
+        Checks answer against the current question without printing anything, and moves on to the next question.
+        Updates number of correct and incorrect answers.
+        :param answer: String answer given to the current question
+        :return: none
+        """
+        key = self.keys[self.number]
         self.number += 1
-        print("Enter answer below:")
-        answer = input()
-        if answer == pair[1]:
+        if is_correct(key, answer):
             self.correct += 1
         else:
             self.incorrect += 1
 
+    def reset(self):
+        """
+        Clears the answers given so far, so the exam can be taken again from the first question.
+        :return: none
+        """
+        self.number = 0
+        self.correct = 0
+        self.incorrect = 0
+
     def did_pass(self):
         """
         :return: A boolean representing whether the player passed or failed the exam.
         """
-        return self.correct / (self.correct + self.incorrect) > 0.5
+        return passes(self.correct, self.incorrect)
+
+
+def parse_answer(answer):
+    """
+    Reads an answer once, so that it can be compared with many others.
+    :param answer: string answer
+    :return: tuple of the answer without surrounding spaces and its value as a float, or None if it is not a number
+    """
+    text = answer.strip()
+    return text, read_number(text)
+
+
+def read_number(text):
+    """
+    :param text: string answer without surrounding spaces
+    :return: its value as a float, or None if it is not written as NUMBER. Spellings that only Python takes for
+        numbers (3_900, inf, nan) are not numbers here.
+    """
+    if NUMBER.fullmatch(text) is None:
+        return None
+    value = float(text)
+    if not math.isfinite(value):
+        return None
+    return value
+
+
+def is_correct(key, answer):
+    """
+    Numeric answers are correct if they are the same number, however they are written (1.038, 1.0380, +1.038).
+    Other answers must match exactly, apart from surrounding spaces.
+    :param key: tuple of the correct answer, as returned by parse_answer
+    :param answer: string answer given
+    :return: True if answer is correct, False otherwise
+    """
+    text, value = key
+    answer = answer.strip()
+    if answer == text:
+        return True
+    if value is None:
+        return False
+    given = read_number(answer)
+    if given is None:
+        return False
+    return math.isclose(given, value, rel_tol=TOLERANCE)
+
+
+def passes(correct, incorrect):
+    """
+    :param correct: integer number of questions answered correctly
+    :param incorrect: integer number of questions answered incorrectly
+    :return: True if that is a pass, which is more than half the answers correct
+    """
+    return correct / (correct + incorrect) > 0.5
@@ -0,0 +1,160 @@
+import argparse
+import collections
+import os
+import random
+
+WORDS = ("the", "old", "quiet", "hallway", "students", "coffee", "smell", "library", "bright", "lecture", "hall",
+         "exam", "notes", "stairs", "window", "chairs", "busy", "empty", "long", "door", "north", "south",
+         "east", "west", "building", "room", "lights", "table", "noise", "people", "walk", "past", "you")
+BLOCKED = "BLOCKED\n0\nFalse\nThis way is blocked.\nThis way is blocked.\nEND\n\n"
+
+
+def generate_map(width, height, walls, rng):
+    """
+    Makes a random grid of open cells and walls, then walls off everything outside the largest connected area,
+    so that every location can be reached from every other.
+    :param width: integer number of columns
+    :param height: integer number of rows
+    :param walls: float between 0 and 1, the chance of each cell starting as a wall
+    :param rng: random.Random object
+    :return: bytearray of width * height cells in row-major order, 1 for a location and 0 for a wall
+    """
+    size = width * height
+    open_cells = bytearray(1 if rng.random() >= walls else 0 for cell in range(size))
+    component = bytearray(size)
+    best = []
+    for cell in range(size):
+        if not open_cells[cell] or component[cell]:
+            continue
+        component[cell] = 1
+        found = [cell]
+        queue = collections.deque(found)
+        while queue:
+            current = queue.popleft()
+            x_value = current % width
+            neighbours = []
+            if x_value > 0:
+                neighbours.append(current - 1)
+            if x_value < width - 1:
+                neighbours.append(current + 1)
+            if current >= width:
+                neighbours.append(current - width)
+            if current < size - width:
+                neighbours.append(current + width)
+            for neighbour in neighbours:
+                if open_cells[neighbour] and not component[neighbour]:
+                    component[neighbour] = 1
+                    found.append(neighbour)
+                    queue.append(neighbour)
+        if len(found) > len(best):
+            best = found
+    cells = bytearray(size)
+    for cell in best:
+        cells[cell] = 1
+    return cells
+
+
+def describe(length, rng):
+    """
+    Makes up a long description of about the given length, wrapped into lines like the ones in locations.txt.
+    :param length: integer number of characters
+    :param rng: random.Random object
+    :return: string of one or more lines, each ending in a newline
+    """
+    lines = []
+    line = []
+    written = 0
+    width = 0
+    while written < length:
+        word = rng.choice(WORDS)
+        if width + len(word) > 90 and line:
+            lines.append(" ".join(line) + "\n")
+            line = []
+            width = 0
+        line.append(word)
+        width += len(word) + 1
+        written += len(word) + 1
+    lines.append(" ".join(line) + ".\n")
+    return "".join(lines)
+
+
+def generate(directory, width, height, walls=0.3, coffee=0.2, items=3, description=300, questions=5, seed=0):
+    """
+    Writes a random world as map.txt, locations.txt, items.txt and puzzle.txt in directory, in the formats the
+    World and Exam loaders read. Every item must be taken to the same location, which is also where the player
+    should start. The same arguments always produce the same files.
+    :param directory: string that gives name of the directory to write into, created if needed
+    :param width: integer number of columns of the map
+    :param height: integer number of rows of the map
+    :param walls: float between 0 and 1, the share of cells that are walls (before unreachable areas are walled off)
+    :param coffee: float between 0 and 1, the share of locations that sell coffee
+    :param items: integer number of items
+    :param description: integer length in characters of every long description
+    :param questions: integer number of exam questions
+    :param seed: integer seed of the random number generator
+    :return: tuple (x, y) of the position of the target location
+    """
+    rng = random.Random(seed)
+    cells = generate_map(width, height, walls, rng)
+    os.makedirs(directory, exist_ok=True)
+    numbers = []
+    map_file = open(os.path.join(directory, "map.txt"), "w")
+    for y_value in range(height):
+        row = []
+        for x_value in range(width):
+            if cells[y_value * width + x_value]:
+                row.append(str(len(numbers)))
+                numbers.append((x_value, y_value))
+            else:
+                row.append("-1")
+        map_file.write(" ".join(row) + "\n")
+    map_file.close()
+    if not numbers:
+        raise ValueError("the generated map has no locations, lower the wall density")
+    location_file = open(os.path.join(directory, "locations.txt"), "w")
+    location_file.write(BLOCKED)
+    for number in range(len(numbers)):
+        name = "Room {0}".format(number)
+        location_file.write("LOCATION {0}\n{1}\n{2}\n{3}\nYou are in {1}.\n{4}END\n\n".format(
+            number, name, rng.randint(1, 10), "True" if rng.random() < coffee else "",
+            describe(description, rng)))
+    location_file.close()
+    target = rng.randrange(len(numbers))
+    item_file = open(os.path.join(directory, "items.txt"), "w")
+    for item in range(items):
+        item_file.write("ITEM {0}\nItem {1}\n{2}\n{3}\nDescription\nEND\n\n".format(
+            rng.randrange(len(numbers)), item, rng.randint(1, 10), target))
+    item_file.close()
+    exam_file = open(os.path.join(directory, "puzzle.txt"), "w")
+    for question in range(questions):
+        first = rng.randint(1, 100)
+        second = rng.randint(1, 100)
+        exam_file.write("QUESTION {0}\n{1} + {2} = ?\n{3}\nEND\n\n".format(question + 1, first, second, first + second))
+    exam_file.close()
+    return numbers[target]
+
+
+def main():
+    """
+    Command line entry point, see python generator.py --help.
+    :return: none
+    """
+    parser = argparse.ArgumentParser(description="Write a random world in the format of the bundled data files.")
+    parser.add_argument("directory")
+    parser.add_argument("--width", type=int, default=100)
+    parser.add_argument("--height", type=int, default=100)
+    parser.add_argument("--walls", type=float, default=0.3)
+    parser.add_argument("--coffee", type=float, default=0.2)
+    parser.add_argument("--items", type=int, default=3)
+    parser.add_argument("--description", type=int, default=300)
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+    x_value, y_value = generate(arguments.directory, arguments.width, arguments.height, arguments.walls,
+                                arguments.coffee, arguments.items, arguments.description, arguments.questions,
+                                arguments.seed)
+    print("Start and target position:", x_value, y_value)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import argparse
+import csv
+
+from game_data import Exam, is_correct, passes
+
+
+def read_sheets(filename):
+    """
+    Streams answer sheets from a CSV file, one sheet per row: an identifier, then the answers in question order.
+    Only one row is held in memory at a time.
+    :param filename: string that gives the name of the CSV file
+    :return: generator of tuples of the identifier and the list of answers of each sheet
+    """
+    sheet_file = open(filename, "r", newline="")
+    try:
+        for row in csv.reader(sheet_file):
+            if row:
+                yield row[0], row[1:]
+    finally:
+        sheet_file.close()
+
+
+def grade_sheets(exam, sheets, results=None):
+    """
+    Grades many answer sheets against exam in a single pass, keeping only running totals, so memory does not grow
+    with the number of sheets. Answers are matched as Exam.grade matches them, with numeric tolerance, and a sheet
+    passes on the same terms as Exam.did_pass. Missing answers are wrong, and answers beyond the last question are
+    ignored.
+    :param exam: an Exam object, it is not modified
+    :param sheets: iterable of tuples of an identifier and a list of string answers, such as read_sheets returns
+    :param results: (Optional) csv.writer object to write the identifier, the number of correct answers and
+        whether the sheet passed to, a row per sheet, as it is graded
+    :return: dictionary with the number of sheets, the number and share of them that passed, and for every question
+        the number and share of sheets that answered it correctly
+    """
+    keys = exam.keys
+    correct = [0] * len(keys)
+    count = 0
+    passed = 0
+    for identifier, answers in sheets:
+        score = 0
+        for number, key in enumerate(keys):
+            if number < len(answers) and is_correct(key, answers[number]):
+                correct[number] += 1
+                score += 1
+        passing = passes(score, len(keys) - score)
+        count += 1
+        passed += passing
+        if results is not None:
+            results.writerow([identifier, score, passing])
+    return {"sheets": count, "passed": passed, "pass_rate": passed / count if count else 0.0,
+            "questions": [{"question": number + 1, "correct": total, "rate": total / count if count else 0.0}
+                          for number, total in enumerate(correct)]}
+
+
+def main():
+    """
+    Command line entry point, see python grading.py --help.
+    :return: none
+    """
+    parser = argparse.ArgumentParser(description="Grade a file of exam answer sheets.")
+    parser.add_argument("sheets", help="CSV file with a row per sheet: an identifier, then the answers")
+    parser.add_argument("--exam", default="puzzle.txt")
+    parser.add_argument("--results", help="CSV file to write every sheet's number of correct answers to")
+    arguments = parser.parse_args()
+    exam = Exam(arguments.exam)
+    results_file = None
+    results = None
+    if arguments.results:
+        results_file = open(arguments.results, "w", newline="")
+        results = csv.writer(results_file)
+    try:
+        report = grade_sheets(exam, read_sheets(arguments.sheets), results)
+    finally:
+        if results_file is not None:
+            results_file.close()
+    for question in report["questions"]:
+        print("Question {0:<4}{1:>10} correct {2:>8.1%}".format(question["question"], question["correct"],
+                                                              question["rate"]))
+    print("Passed {0} of {1} sheets ({2:.1%})".format(report["passed"], report["sheets"], report["pass_rate"]))
+
+
+if __name__ == "__main__":
+    main()
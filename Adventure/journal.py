@@ -0,0 +1,163 @@
+import json
+import marshal
+import os
+import sys
+
+from adventure import dispatch, new_game
+from events import NullRenderer
+from state import dump_state, restore_state, fork
+
+VERSION = 1
+# Turns between the checkpoints written into a journal
+INTERVAL = 50
+
+
+class Journal:
+    def __init__(self, filename, interval=INTERVAL):
+        """
+        Creates a new Journal: an append-only log of one session. Every accepted command is a marshalled
+        (command, argument) record, and every interval turns a ("checkpoint", turn, state) record holds the
+        whole state of the game (see state.dump_state), so that any turn can be rebuilt from the nearest
+        checkpoint before it without replaying the session from the start.
+        The commands are the actions Game.menu allowed, with the item name as the argument of take and drop;
+        "answer", with the answer as its argument; and "begin", for the start of every play-through.
+        :param filename: string that gives the name of the file to write, replaced if it exists
+        :param interval: (Optional) integer number of turns between checkpoints
+        :return: a Journal object
+        """
+        self.file = open(filename, "wb")
+        self.interval = interval
+        self.turn = 0
+        marshal.dump(("journal", VERSION), self.file)
+
+    def record(self, game, command, argument=None):
+        """
+        Appends a command once it has been carried out in full (including checking whether the game is over),
+        followed by a checkpoint when one is due.
+        :param game: the Game object the command was carried out on
+        :param command: string command
+        :param argument: (Optional) string argument of the command
+        :return: none
+        """
+        marshal.dump((command, argument), self.file)
+        self.turn += 1
+        if self.turn % self.interval == 0:
+            marshal.dump(("checkpoint", self.turn, dump_state(game)), self.file)
+        self.file.flush()
+
+    def close(self):
+        """
+        :return: none
+        """
+        self.file.close()
+
+
+def read_journal(filename):
+    """
+    :param filename: string that gives the name of a journal file
+    :return: tuple of the list of (command, argument) records and the dictionary of checkpoint states keyed by the
+        turn they were taken at
+    """
+    commands = []
+    checkpoints = {}
+    journal_file = open(filename, "rb")
+    try:
+        header = marshal.load(journal_file)
+        if header != ("journal", VERSION):
+            raise ValueError("{0} is not a version {1} journal".format(filename, VERSION))
+        while True:
+            try:
+                record = marshal.load(journal_file)
+            except EOFError:
+                break
+            if record[0] == "checkpoint":
+                checkpoints[record[1]] = record[2]
+            else:
+                commands.append(record)
+    finally:
+        journal_file.close()
+    return commands, checkpoints
+
+
+def perform(game, command, argument):
+    """
+    Carries out a recorded command, as the Session that recorded it did.
+    :param game: a Game object
+    :param command: string command
+    :param argument: string argument of the command, or None
+    :return: none
+    """
+    if command == "begin":
+        game.reset()
+        game.move(0, 0)
+    elif command == "answer":
+        game.final_exam.grade(argument)
+    elif command != "quit":
+        dispatch(game, command, argument or "")
+        game.check()
+
+
+def rebuild(template, filename, turn=None):
+    """
+    Rebuilds a session as it was after a given number of turns, from the nearest checkpoint at or before it.
+    :param template: a Game object of the same world as the session, it is not modified
+    :param filename: string that gives the name of the journal file
+    :param turn: (Optional) integer number of recorded commands to rebuild up to. If not given, all of them.
+    :return: a new Game object in the state of the session after turn commands
+    """
+    commands, checkpoints = read_journal(filename)
+    if turn is None or turn > len(commands):
+        turn = len(commands)
+    game = fork(template)
+    game.set_output(NullRenderer())
+    start = max((taken for taken in checkpoints if taken <= turn), default=0)
+    if start:
+        restore_state(game, checkpoints[start])
+    for command, argument in commands[start:turn]:
+        perform(game, command, argument)
+    return game
+
+
+def export(filenames, output):
+    """
+    Writes the commands of many journals to one JSON Lines file for offline analysis, a line per command with the
+    journal's name, the turn, the command and its argument. Journals are read one at a time.
+    :param filenames: iterable of strings that give the names of the journal files
+    :param output: string that gives the name of the file to write
+    :return: integer number of lines written
+    """
+    lines = 0
+    output_file = open(output, "w")
+    for filename in filenames:
+        name = os.path.basename(filename)
+        commands, checkpoints = read_journal(filename)
+        for turn, (command, argument) in enumerate(commands):
+            output_file.write(json.dumps({"journal": name, "turn": turn, "command": command,
+                                          "argument": argument}) + "\n")
+            lines += 1
+    output_file.close()
+    return lines
+
+
+def main(arguments):
+    """
+    Command line entry point.
+        python journal.py rebuild FILE [TURN]     prints the state of the session in FILE after TURN commands
+        python journal.py export OUTPUT FILE...   writes the commands of every FILE to OUTPUT as JSON Lines
+    :param arguments: list of command line arguments
+    :return: none
+    """
+    if arguments[0] == "rebuild":
+        game = rebuild(new_game(), arguments[1], int(arguments[2]) if len(arguments) > 2 else None)
+        statistics = game.statistics
+        print("Position:", game.player.get_position())
+        print("Time:", statistics.str_time())
+        print("Score:", statistics.get_score())
+        print("Inventory:", ", ".join(item.get_name() for item in game.player.get_inventory()))
+        print("Over:", game.over, "Lost:", game.lost)
+    elif arguments[0] == "export":
+        print(export(arguments[2:], arguments[1]), "commands written")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,95 @@
+import asyncio
+import sys
+import time
+
+from replay import load_transcript
+from session import PROMPTS
+
+ENDINGS = tuple(prompt.encode() for prompt in PROMPTS)
+
+
+async def read_reply(reader):
+    """
+    Reads everything the server sends until it asks for input again or closes the connection.
+    :param reader: asyncio.StreamReader of the connection
+    :return: bytes of the reply
+    """
+    reply = b""
+    while not reply.endswith(ENDINGS):
+        chunk = await reader.read(65536)
+        if not chunk:
+            break
+        reply += chunk
+    return reply
+
+
+async def play(address, commands, latencies):
+    """
+    Plays one session against the server, sending one command at a time and waiting for each reply.
+    :param address: string, either a TCP port number or "unix:" followed by the path of a Unix socket
+    :param commands: list of strings to send, in the format of solution.txt
+    :param latencies: list that the round trip time of every command, in seconds, is appended to
+    :return: none
+    """
+    if address.startswith("unix:"):
+        reader, writer = await asyncio.open_unix_connection(address[len("unix:"):])
+    else:
+        reader, writer = await asyncio.open_connection("127.0.0.1", int(address))
+    await read_reply(reader)
+    for command in commands:
+        start = time.perf_counter()
+        writer.write(command.encode() + b"\n")
+        await writer.drain()
+        reply = await read_reply(reader)
+        latencies.append(time.perf_counter() - start)
+        if not reply.endswith(ENDINGS):
+            break
+    writer.close()
+
+
+def percentile(ordered, fraction):
+    """
+    :param ordered: non-empty sorted list of numbers
+    :param fraction: float between 0 and 1
+    :return: the value below which the given fraction of the numbers lie
+    """
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run(address, clients, commands):
+    """
+    Plays the same transcript from many concurrent clients and prints the throughput and latency.
+    :param address: string, either a TCP port number or "unix:" followed by the path of a Unix socket
+    :param clients: integer number of concurrent sessions
+    :param commands: list of strings to send in every session
+    :return: none
+    """
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(play(address, commands, latencies) for client in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print("sessions:", clients)
+    print("commands:", len(latencies))
+    print("elapsed: {0:.3f} s".format(elapsed))
+    print("throughput: {0:.0f} commands/s".format(len(latencies) / elapsed))
+    for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0)):
+        print("{0}: {1:.3f} ms".format(name, percentile(latencies, fraction) * 1000))
+
+
+def main(arguments):
+    """
+    Command line entry point.
+        python loadgen.py [CLIENTS] [PORT | unix:PATH] [TRANSCRIPT]
+    Defaults to 1000 clients playing solution.txt against port 8023.
+    :param arguments: list of command line arguments
+    :return: none
+    """
+    clients = int(arguments[0]) if len(arguments) > 0 else 1000
+    address = arguments[1] if len(arguments) > 1 else "8023"
+    commands = load_transcript(arguments[2] if len(arguments) > 2 else "solution.txt")
+    asyncio.run(run(address, clients, commands))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
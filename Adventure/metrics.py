@@ -0,0 +1,221 @@
+import json
+import os
+import sys
+import threading
+import time
+
+# The Game methods that carry out the commands players type, and the loaders that read the data files.
+# Nothing is timed unless enable is called: until then these are the plain methods, with no overhead at all.
+# Game.exam is left out, as in run_game it waits for the player to type the answers.
+COMMANDS = ("menu", "look", "search", "move", "inventory", "take", "drop", "score", "buy", "check")
+LOADERS = (("World", ("load_map", "load_locations", "map_locations", "load_items", "load_snapshot")),
+           ("Exam", ("load_exam",)))
+BUCKETS = 32
+
+# The Metrics object that is recording, or None if instrumentation is disabled
+active = None
+originals = []
+
+
+class Metrics:
+    def __init__(self):
+        """
+        Creates a new Metrics: counts and latency histograms of every command, how long each data file took to
+        load, and how many turns each session lasted.
+        Histograms have a bucket per power of two: a latency of n microseconds goes in bucket n.bit_length(),
+        and so does a session of n turns.
+        :return: a Metrics object
+        """
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.commands = {}
+        self.loads = {}
+        self.turns = [0] * BUCKETS
+        self.sessions = 0
+        self.dumper = None
+
+    def record(self, command, seconds):
+        """
+        :param command: string name of the command
+        :param seconds: float time the command took
+        :return: none
+        """
+        bucket = min(int(seconds * 1e6).bit_length(), BUCKETS - 1)
+        with self.lock:
+            entry = self.commands.get(command)
+            if entry is None:
+                entry = self.commands[command] = [0, 0.0, [0] * BUCKETS]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2][bucket] += 1
+
+    def load(self, name, seconds):
+        """
+        :param name: string name of the loader
+        :param seconds: float time the loader took
+        :return: none
+        """
+        with self.lock:
+            self.loads.setdefault(name, []).append(seconds)
+
+    def end_session(self, turns):
+        """
+        Notes that a play-through has ended.
+        :param turns: integer number of commands the player gave
+        :return: none
+        """
+        with self.lock:
+            self.sessions += 1
+            self.turns[min(turns.bit_length(), BUCKETS - 1)] += 1
+
+    def snapshot(self):
+        """
+        :return: dictionary of everything recorded so far, that can be written as JSON. Histograms are dictionaries
+            of counts keyed by the exclusive upper bound of their bucket (microseconds or turns), leaving out
+            empty buckets.
+        """
+        with self.lock:
+            commands = {command: {"count": count, "seconds": seconds, "histogram": histogram(buckets)}
+                        for command, (count, seconds, buckets) in self.commands.items()}
+            return {"time": time.time(), "uptime": time.time() - self.started, "commands": commands,
+                    "loads": {name: list(times) for name, times in self.loads.items()},
+                    "sessions": {"count": self.sessions, "turns": histogram(self.turns)}}
+
+    def dump(self, filename):
+        """
+        Writes a snapshot to filename as JSON. The file is replaced in one step, so a reader never sees half of it.
+        :param filename: string that gives the name of the file to write
+        :return: none
+        """
+        partial = filename + ".tmp"
+        dump_file = open(partial, "w")
+        json.dump(self.snapshot(), dump_file, indent=1)
+        dump_file.close()
+        os.replace(partial, filename)
+
+    def dump_every(self, filename, interval):
+        """
+        Dumps a snapshot to filename every interval seconds from a background thread, until stop_dumps is called.
+        :param filename: string that gives the name of the file to write
+        :param interval: float seconds between dumps
+        :return: none
+        """
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                self.dump(filename)
+
+        self.dumper = (stop, threading.Thread(target=run, daemon=True))
+        self.dumper[1].start()
+
+    def stop_dumps(self):
+        """
+        Stops the dumps started by dump_every.
+        :return: none
+        """
+        if self.dumper is not None:
+            stop, thread = self.dumper
+            stop.set()
+            thread.join()
+            self.dumper = None
+
+
+def histogram(buckets):
+    """
+    :param buckets: list of counts, one per power of two
+    :return: dictionary of the counts that are not zero, keyed by the exclusive upper bound of their bucket
+    """
+    return {1 << bucket: count for bucket, count in enumerate(buckets) if count}
+
+
+def timed_command(name, method):
+    """
+    :param name: string name of the command
+    :param method: function to time
+    :return: function that calls method and records how long it took in the active Metrics
+    """
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            active.record(name, time.perf_counter() - start)
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+def timed_loader(name, method):
+    """
+    :param name: string name of the loader
+    :param method: function to time
+    :return: function that calls method and records how long it took in the active Metrics
+    """
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            active.load(name, time.perf_counter() - start)
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+def enable(metrics=None):
+    """
+    Starts recording: replaces the Game commands and the World and Exam loaders with timed versions.
+    Games that already exist are timed too, from their next command.
+    :param metrics: (Optional) Metrics object to record into. If not given, a new one.
+    :return: the Metrics object being recorded into
+    """
+    global active
+    from adventure import Game
+    import game_data
+    if active is not None:
+        disable()
+    active = metrics if metrics is not None else Metrics()
+    for name in COMMANDS:
+        originals.append((Game, name, Game.__dict__[name]))
+        setattr(Game, name, timed_command(name, Game.__dict__[name]))
+    for class_name, names in LOADERS:
+        cls = getattr(game_data, class_name)
+        for name in names:
+            originals.append((cls, name, cls.__dict__[name]))
+            setattr(cls, name, timed_loader(class_name + "." + name, cls.__dict__[name]))
+    return active
+
+
+def disable():
+    """
+    Stops recording and puts the plain methods back.
+    :return: the Metrics object that was being recorded into, or None if recording was not enabled
+    """
+    global active
+    while originals:
+        cls, name, method = originals.pop()
+        setattr(cls, name, method)
+    metrics = active
+    active = None
+    return metrics
+
+
+def main(arguments):
+    """
+    Command line entry point.
+        python metrics.py FILE   plays the game as adventure.py does, writing what was recorded to FILE at the end
+    :param arguments: list of command line arguments
+    :return: none
+    """
+    # Run as a script, this module is __main__, so the game's "import metrics" would not see what is recorded here
+    import metrics
+    from adventure import run_game
+    recording = metrics.enable()
+    try:
+        run_game()
+    finally:
+        metrics.disable()
+        recording.dump(arguments[0] if arguments else "metrics.json")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,258 @@
+import argparse
+import random
+import threading
+import time
+
+from adventure import DIRECTIONS, new_game
+from events import NullRenderer
+from game_data import Inventory, WorldState
+from state import fork
+
+
+class SharedItems:
+    def __init__(self, world, stripes=64):
+        """
+        Creates a new SharedItems: where the items of one World are, for many players at once. Taking and dropping
+        lock only the position involved (one of stripes locks, chosen by the position), so players in different
+        places never wait for each other. Looking at the items takes no lock at all.
+        :param world: a World object
+        :param stripes: (Optional) integer number of locks the positions are spread over
+        :return: a SharedItems object with every item where it starts
+        """
+        self.world = world
+        self.locks = [threading.Lock() for stripe in range(stripes)]
+        self.starts = {id(item): position for item, position in zip(world.items, world.starts)}
+        self.items = {}
+        self.reset()
+
+    def lock(self, position):
+        """
+        :param position: Tuple representation of a position on the map
+        :return: the threading.Lock object that guards position
+        """
+        return self.locks[hash(position) % len(self.locks)]
+
+    def reset(self):
+        """
+        Puts every item back where it started, taking it from whoever has it.
+        :return: none
+        """
+        for lock in self.locks:
+            lock.acquire()
+        try:
+            items = {}
+            for item, position in zip(self.world.items, self.world.starts):
+                items.setdefault(position, Inventory()).add(item)
+            self.items = items
+        finally:
+            for lock in self.locks:
+                lock.release()
+
+    def get_items(self, position):
+        """
+        :param position: Tuple representation of a position on the map
+        :return: A new Inventory of the items at position when it was called, in the order they were added
+        """
+        with self.lock(position):
+            items = self.items.get(position)
+            if items is None:
+                return Inventory()
+            return items.copy()
+
+    def has_item(self, position, name=None):
+        """
+        Looks without locking, so the answer may be out of date by the time it is used. Game.take does not rely on
+        it: it only takes what pop_item hands over.
+        :param position: Tuple representation of a position on the map
+        :param name: (Optional) String representation of the name of an item
+        :return: True if there is an item (with that name, if given) at position, False otherwise
+        """
+        items = self.items.get(position)
+        if items is None:
+            return False
+        if name is None:
+            return True
+        return name in items
+
+    def add_item(self, position, item):
+        """
+        :param position: Tuple representation of a position on the map
+        :param item: An item object
+        :return: none
+        """
+        with self.lock(position):
+            items = self.items.get(position)
+            if items is None:
+                items = self.items[position] = Inventory()
+            items.add(item)
+
+    def pop_item(self, position, name):
+        """
+        :param position: Tuple representation of a position on the map
+        :param name: The name of the item
+        :return: The item object, or None if there is none with that name at position (or another player got it
+            first)
+        """
+        with self.lock(position):
+            items = self.items.get(position)
+            if items is None:
+                return None
+            item = items.pop(name)
+            if not items:
+                del self.items[position]
+            return item
+
+
+class SharedWorldState(WorldState):
+    def __init__(self, shared):
+        """
+        Creates a new SharedWorldState: one player's WorldState in a world shared with others. The locations the
+        player has visited and the coffee closed by their events are their own, but the items are in SharedItems,
+        where every player can take them.
+        :param shared: a SharedItems object
+        :return: a SharedWorldState object with no location visited
+        """
+        self.world = shared.world
+        self.shared = shared
+        self.visited = bytearray((len(self.world.locations) + 7) // 8)
+        self.closed = set()
+
+    @property
+    def items(self):
+        """
+        :return: dictionary of the Inventory at every position with items, shared by every player
+        """
+        return self.shared.items
+
+    def reset(self, held=()):
+        """
+        Forgets the locations the player has visited, and puts the items the player held back where they started.
+        The other items are left as the other players have them, see SharedItems.reset.
+        :param held: (Optional) iterable of the Item objects the player held
+        :return: none
+        """
+        self.visited = bytearray(len(self.visited))
+        self.closed = set()
+        for item in held:
+            self.shared.add_item(self.shared.starts[id(item)], item)
+
+    def copy(self):
+        """
+        :return: a new SharedWorldState of another player of the same shared world, who has visited the same
+            locations as this one
+        """
+        duplicate = SharedWorldState(self.shared)
+        duplicate.visited = self.visited[:]
+        duplicate.closed = set(self.closed)
+        return duplicate
+
+    def get_items(self, position):
+        """
+        See SharedItems.get_items
+        """
+        return self.shared.get_items(position)
+
+    def has_item(self, position, name=None):
+        """
+        See SharedItems.has_item
+        """
+        return self.shared.has_item(position, name)
+
+    def add_item(self, position, item):
+        """
+        See SharedItems.add_item
+        """
+        self.shared.add_item(position, item)
+
+    def pop_item(self, position, name):
+        """
+        See SharedItems.pop_item
+        """
+        return self.shared.pop_item(position, name)
+
+
+def share(game, stripes=64):
+    """
+    Makes the world of game a shared one. Every game forked from it afterwards (see state.fork) is another player
+    of the same world, competing for the same items. Each player can win only by holding every item.
+    :param game: a Game object that has not been played yet
+    :param stripes: (Optional) integer number of locks, see SharedItems
+    :return: the SharedItems object of the world
+    """
+    shared = SharedItems(game.world, stripes)
+    game.world_state = SharedWorldState(shared)
+    return shared
+
+
+def wander(game, turns, seed):
+    """
+    Plays game at random: moving, taking whatever is found and now and then dropping something.
+    :param game: a Game object
+    :param turns: integer number of turns to play
+    :param seed: integer seed of the random number generator
+    :return: none
+    """
+    rng = random.Random(seed)
+    directions = list(DIRECTIONS.values())
+    for turn in range(turns):
+        position = game.player.get_position()
+        roll = rng.random()
+        if roll < 0.3 and game.world_state.has_item(position):
+            for item in game.world_state.get_items(position):
+                game.take(item.get_name())
+        elif roll < 0.4 and game.player.has_item():
+            game.drop(rng.choice([item.get_name() for item in game.player.get_inventory()]))
+        else:
+            game.move(*rng.choice(directions))
+
+
+def contend(template, players, turns, seed=0):
+    """
+    Lets players wander one shared world at the same time, one thread each, then checks that no item was lost or
+    duplicated along the way.
+    :param template: a Game object whose world has been shared (see share), it is not played
+    :param players: integer number of players
+    :param turns: integer number of turns each player plays
+    :param seed: (Optional) integer seed of the players' random number generators
+    :return: float seconds the players took
+    """
+    games = []
+    for player in range(players):
+        game = fork(template)
+        game.set_output(NullRenderer())
+        games.append(game)
+    threads = [threading.Thread(target=wander, args=(game, turns, seed + number))
+               for number, game in enumerate(games)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    held = [id(item) for game in games for item in game.player.get_inventory()]
+    held += [id(item) for items in list(template.world_state.items.values()) for item in items]
+    if sorted(held) != sorted(id(item) for item in template.world.items):
+        raise AssertionError("items were lost or duplicated")
+    return elapsed
+
+
+def main():
+    """
+    Command line entry point, see python multiplayer.py --help.
+    :return: none
+    """
+    parser = argparse.ArgumentParser(description="Play many random players in one shared world at once.")
+    parser.add_argument("--players", type=int, nargs="*", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--turns", type=int, default=20000)
+    parser.add_argument("--stripes", type=int, default=64)
+    arguments = parser.parse_args()
+    template = new_game()
+    shared = share(template, arguments.stripes)
+    for players in arguments.players:
+        shared.reset()
+        elapsed = contend(template, players, arguments.turns)
+        print("{0:>4} players {1:>12.0f} turns/s".format(players, players * arguments.turns / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from game_data import Item
+from game_data import Item, Inventory
 
 
 class Player:
@@ -9,7 +9,9 @@ class Player:
         :param y: y-coordinate of position on map
         :return: an object Player located at a position (x_coordinate, y_coordinate) on map
         """
-        self.inventory = []
+        self.inventory = Inventory()
+        # How many of the items held have each position as their target, kept up to date by add_item and pop_item
+        self.targets = {}
         self.tiredness = 0
         self.x = x_coordinate
         self.y = y_coordinate
@@ -23,8 +25,8 @@ class Player:
 
     def get_inventory(self):
         """
-        Returns the player's inventory as a list
-        :return: A list of the items in the player's inventory
+        Returns the player's inventory
+        :return: An Inventory of the items in the player's inventory, in the order they were taken
         """
         return self.inventory
 
@@ -52,7 +54,9 @@ class Player:
         :param item: An item object
         :return: none
         """
-        self.inventory.append(item)
+        self.inventory.add(item)
+        target = item.get_target_position()
+        self.targets[target] = self.targets.get(target, 0) + 1
 
     def update_tiredness(self, amount):
         """
@@ -69,9 +73,21 @@ class Player:
         :return: The removed item object
         Remove item from inventory.
         """
-        for index, item in enumerate(self.inventory):
-            if name == item.get_name():
-                return self.inventory.pop(index)
+        item = self.inventory.pop(name)
+        if item is not None:
+            target = item.get_target_position()
+            if self.targets[target] == 1:
+                del self.targets[target]
+            else:
+                self.targets[target] -= 1
+        return item
+
+    def count_targets(self, position):
+        """
+        :param position: Tuple representation of a position on the map
+        :return: integer number of the items held whose target is position
+        """
+        return self.targets.get(position, 0)
 
     def has_item(self, name=None):
         """
@@ -84,7 +100,4 @@ class Player:
         """
         if name is None:
             return bool(self.inventory)
-        for item in self.inventory:
-            if item.get_name() == name:
-                return True
-        return False
+        return name in self.inventory
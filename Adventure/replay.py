@@ -0,0 +1,121 @@
+import sys
+
+from adventure import ITEM_ACTIONS, new_game, split_commands, resolve, dispatch
+from events import NullRenderer
+from state import fork
+
+
+class Result:
+    def __init__(self, game, turns, finished, quit, won):
+        """
+        Creates a new Result object summarising a replayed session.
+        :param game: the Game object after the replay has run
+        :param turns: integer number of commands read from the stream (item names and exam answers excluded)
+        :param finished: bool value, True if the session reached an ending before the commands ran out
+        :param quit: bool value, True if the session ended with the quit command
+        :param won: bool value, True if the player reached the exam in time and passed it
+        :return: a Result object
+        """
+        statistics = game.statistics
+        self.score = statistics.get_score()
+        self.time = statistics.str_time()
+        self.moves = statistics.moves
+        self.turns = turns
+        self.finished = finished
+        self.quit = quit
+        self.won = won
+        self.lost = finished and not quit and not won
+
+    def __repr__(self):
+        return "Result(score={0}, time={1}, moves={2}, turns={3}, finished={4}, quit={5}, won={6})".format(
+            self.score, self.time, self.moves, self.turns, self.finished, self.quit, self.won)
+
+
+def load_transcript(filename):
+    """
+    Reads a command transcript (in the format of solution.txt) into memory.
+    :param filename: string that gives the name of the transcript file
+    :return: list of the commands in the transcript, one per line, without line endings
+    """
+    transcript_file = open(filename, "r")
+    commands = transcript_file.read().splitlines()
+    transcript_file.close()
+    return commands
+
+
+def replay(game, commands):
+    """
+    Runs a session of game to completion from a stream of commands, without reading from or writing to the terminal.
+    The stream is read exactly as run_game reads its input: one or more actions per line, separated by semicolons,
+    the item name after "take" or "drop" or on the line after it, and one line per exam question once the game is
+    over. Anything after that is ignored.
+    :param game: a Game object that has not been played yet, it is modified in place
+    :param commands: iterable of strings (a list, a generator or an open transcript file)
+    :return: a Result object describing how the session ended
+    """
+    lines = (line.rstrip("\n") for line in commands)
+    game.set_output(NullRenderer())
+    return play(game, lines)
+
+
+def play(game, lines, watch=None):
+    """
+    Runs the engine loop of run_game against an iterator of lines, sending whatever the game says to its output.
+    :param game: a Game object that has not been played yet
+    :param lines: iterator of commands without line endings
+    :param watch: (Optional) function called as watch(game, action) after every command but quit has been carried
+        out and checked, with the action it resolved to, or None if it was not allowed (see fuzz.py)
+    :return: a Result object describing how the session ended
+    """
+    turns = 0
+    commands = []
+    game.move(0, 0)
+    while not game.over:
+        if not commands:
+            line = next(lines, None)
+            if line is None:
+                return Result(game, turns, False, False, False)
+            commands = split_commands(line)
+        turns += 1
+        action, name = resolve(commands.pop(0), game.menu())
+        if action is None:
+            commands = []
+        elif action == "quit":
+            return Result(game, turns, True, True, False)
+        else:
+            if action in ITEM_ACTIONS and not name:
+                name = next(lines, "")
+                commands = []
+            dispatch(game, action, name)
+        game.check()
+        if watch is not None:
+            watch(game, action)
+    won = not game.lost and game.exam(lines)
+    return Result(game, turns, True, False, won)
+
+
+def replay_many(template, transcripts):
+    """
+    Replays every transcript against a fresh copy of template, so the data files are only read once.
+    :param template: a Game object that has not been played yet, it is never modified
+    :param transcripts: iterable of command streams, each one accepted by replay
+    :return: generator of Result objects, one per transcript, in order
+    """
+    for commands in transcripts:
+        yield replay(fork(template), commands)
+
+
+def main(filenames):
+    """
+    Replays each transcript file against the bundled world and prints how it ended.
+    :param filenames: list of transcript file names
+    :return: none
+    """
+    template = new_game()
+    transcripts = [load_transcript(filename) for filename in filenames]
+    for filename, result in zip(filenames, replay_many(template, transcripts)):
+        print(filename, result)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
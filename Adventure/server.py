@@ -0,0 +1,106 @@
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+
+import metrics
+from adventure import new_game, background_information
+from journal import Journal
+from multiplayer import share
+from session import Session
+
+
+async def serve_client(reader, writer, template, background, journal=None):
+    """
+    Plays one session with a connected client: every line it sends is fed to the session, and everything
+    the session prints is sent back. The connection is closed when the session ends or the client leaves.
+    :param reader: asyncio.StreamReader of the connection
+    :param writer: asyncio.StreamWriter of the connection
+    :param template: a Game object that has not been played yet, copied for every play-through
+    :param background: dictionary of game messages, as returned by background_information
+    :param journal: (Optional) Journal object to record the session in, closed when the session ends
+    :return: none
+    """
+    session = Session(template, background, journal)
+    writer.write(session.start().encode())
+    try:
+        while session.is_open():
+            await writer.drain()
+            line = await reader.readline()
+            if not line:
+                break
+            writer.write(session.feed(line.decode().rstrip("\r\n")).encode())
+        await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        # Gives back what the player held, in case the world is shared
+        session.close()
+        writer.close()
+        if journal is not None:
+            journal.close()
+
+
+async def serve(address, journals=None, shared=False):
+    """
+    Hosts game sessions in this event loop until cancelled, one per connection.
+    The data files are read once; every session plays on its own copy of the loaded game.
+    :param address: string, either a TCP port number or "unix:" followed by the path of a Unix socket
+    :param journals: (Optional) string that gives the name of a directory to record every session in, one
+        journal file per session, named by the process and the order the sessions started in
+    :param shared: (Optional) bool value, True for every session to play in one world, competing for its items
+    :return: none
+    """
+    template = new_game()
+    if shared:
+        share(template)
+    background = background_information("background.txt")
+    numbers = itertools.count()
+    if journals is not None:
+        os.makedirs(journals, exist_ok=True)
+
+    async def handle(reader, writer):
+        journal = None
+        if journals is not None:
+            name = "{0}-{1}.journal".format(os.getpid(), next(numbers))
+            journal = Journal(os.path.join(journals, name))
+        await serve_client(reader, writer, template, background, journal)
+
+    if address.startswith("unix:"):
+        server = await asyncio.start_unix_server(handle, address[len("unix:"):], backlog=4096)
+    else:
+        server = await asyncio.start_server(handle, "127.0.0.1", int(address), backlog=4096)
+    async with server:
+        await server.serve_forever()
+
+
+def main(arguments):
+    """
+    Command line entry point, see python server.py --help.
+    :param arguments: list of command line arguments
+    :return: none
+    """
+    parser = argparse.ArgumentParser(description="Host game sessions over TCP or a Unix socket.")
+    parser.add_argument("address", nargs="?", default="8023", help="TCP port number, or unix:PATH")
+    parser.add_argument("--metrics", help="time the commands, writing what was recorded to this file every 10 s")
+    parser.add_argument("--journals", help="record every session in a journal file in this directory")
+    parser.add_argument("--shared", action="store_true", help="play every session in one world")
+    arguments = parser.parse_args(arguments)
+    recording = None
+    if arguments.metrics:
+        recording = metrics.enable()
+        recording.dump_every(arguments.metrics, 10)
+    try:
+        asyncio.run(serve(arguments.address, arguments.journals, arguments.shared))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if recording is not None:
+            recording.stop_dumps()
+            metrics.disable()
+            recording.dump(arguments.metrics)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,203 @@
+import metrics
+from adventure import ITEM_ACTIONS, split_commands, resolve, dispatch, ask_item
+from events import TextRenderer
+from state import fork
+
+# Every piece of output a session produces ends with one of these, once it needs another line of input
+PROMPTS = ("Enter action: ", "Take what?\n", "Drop what?\n", "Enter answer below:\n", "yes : no\n")
+
+
+class Session:
+    def __init__(self, template, background, journal=None):
+        """
+        Creates a new Session: one player's run_game, driven a line at a time instead of by input().
+        Fed the same lines, a session produces exactly the text that run_game prints.
+        :param template: a Game object that has not been played yet. The session plays on a copy of it.
+        :param background: dictionary of game messages, as returned by background_information
+        :param journal: (Optional) Journal object that every accepted command is recorded in (see journal.py)
+        :return: a Session object
+        """
+        self.template = template
+        self.background = background
+        self.game = None
+        self.output = TextRenderer(buffered=True)
+        self.allowed = []
+        self.waiting = None
+        # Commands given on the same line as the last one, still to be carried out
+        self.commands = []
+        self.turns = 0
+        self.journal = journal
+
+    def is_open(self):
+        """
+        :return: True if the session is waiting for another line, False once the player has chosen not to replay
+        """
+        return self.waiting is not None
+
+    def start(self):
+        """
+        Starts the first play-through.
+        :return: string of the text printed up to the first prompt
+        """
+        self.begin()
+        return self.output.pop_text()
+
+    def feed(self, line):
+        """
+        Hands the session the next line the player typed.
+        :param line: string without its line ending
+        :return: string of the text printed up to the next prompt, or the end of the session
+        """
+        if self.waiting == "action":
+            self.commands = split_commands(line)
+            while self.commands and self.waiting == "action":
+                self.act(self.commands.pop(0))
+            self.commands = []
+        elif self.waiting in ITEM_ACTIONS:
+            action = self.waiting
+            dispatch(self.game, action, line)
+            self.end_turn()
+            self.log(action, line)
+        elif self.waiting == "answer":
+            self.answer(line)
+        elif self.waiting == "again":
+            if line == "yes":
+                self.begin()
+            else:
+                self.close()
+        return self.output.pop_text()
+
+    def begin(self):
+        """
+        Starts a play-through: on a copy of the template game the first time, and on the same game, reset, after that.
+        :return: none
+        """
+        if self.game is None:
+            self.game = fork(self.template)
+            self.game.set_output(self.output)
+        else:
+            self.game.reset()
+        self.turns = 0
+        self.game.say(self.background["INTRODUCTION"])
+        self.game.exam_time()
+        self.game.say()
+        self.game.move(0, 0)
+        self.ask()
+        self.log("begin")
+
+    def log(self, command, argument=None):
+        """
+        Records a command that has been carried out in full in the journal, if there is one.
+        :param command: string command
+        :param argument: (Optional) string argument of the command
+        :return: none
+        """
+        if self.journal is not None:
+            self.journal.record(self.game, command, argument)
+
+    def ask(self):
+        """
+        Prints the time and the menu, and the action prompt unless there are commands left from the last line.
+        :return: none
+        """
+        self.game.time()
+        self.game.say("What do you want to do?")
+        self.allowed = self.game.menu()
+        self.game.say()
+        if not self.commands:
+            self.output.emit("prompt", "Enter action: ")
+        self.waiting = "action"
+
+    def act(self, command):
+        """
+        Carries out one command, as run_game does.
+        :param command: string command, as typed
+        :return: none
+        """
+        game = self.game
+        self.turns += 1
+        game.say(command.lower())
+        action, name = resolve(command, self.allowed)
+        if action is None:
+            game.say("That action is not allowed here!")
+            game.say()
+            self.commands = []
+            self.end_turn()
+        elif action == "quit":
+            game.say("Game over!")
+            self.wrap_up()
+            self.log(action)
+        elif action in ITEM_ACTIONS and not name:
+            ask_item(game, action)
+            self.commands = []
+            self.waiting = action
+        else:
+            dispatch(game, action, name)
+            self.end_turn()
+            self.log(action, name or None)
+
+    def end_turn(self):
+        """
+        Checks whether the game is over, and either moves on to the ending or asks for the next action.
+        :return: none
+        """
+        self.game.check()
+        if not self.game.over:
+            self.ask()
+        elif self.game.lost:
+            self.game.say(self.background["DEFEAT"])
+            self.wrap_up()
+        else:
+            self.output.emit("exam_start")
+            self.question()
+
+    def question(self):
+        """
+        Poses the next exam question.
+        :return: none
+        """
+        self.game.final_exam.administer_question()
+        self.output.emit("answer_prompt")
+        self.waiting = "answer"
+
+    def answer(self, line):
+        """
+        Grades an exam answer, then poses the next question or announces the result.
+        :param line: string answer
+        :return: none
+        """
+        final_exam = self.game.final_exam
+        final_exam.grade(line)
+        self.log("answer", line)
+        if final_exam.number < final_exam.get_length():
+            self.question()
+        elif final_exam.did_pass():
+            self.game.say(self.background["VICTORY"])
+            self.wrap_up()
+        else:
+            self.game.say(self.background["DEFEAT"])
+            self.wrap_up()
+
+    def close(self):
+        """
+        Ends the session, whether the player chose not to replay or left part way through. The game is reset, so
+        in a shared world (see multiplayer.py) the items the player held go back where they started, for the other
+        players to find. Closing again does nothing.
+        :return: none
+        """
+        self.waiting = None
+        if self.game is not None:
+            self.game.reset()
+            self.game = None
+
+    def wrap_up(self):
+        """
+        Prints the final score and asks whether to play again.
+        :return: none
+        """
+        self.game.score()
+        if metrics.active is not None:
+            metrics.active.end_session(self.turns)
+        self.game.say("Do you want to play again?")
+        self.game.say("yes : no")
+        self.waiting = "again"
@@ -0,0 +1,231 @@
+import argparse
+
+import numpy
+
+from adventure import new_game
+
+# Action codes: the four moves in the order of DIRECTIONS_X and DIRECTIONS_Y, then the other actions that change
+# the state of the game. Looking, the inventory and the score take no time, so they are never simulated.
+NORTH, SOUTH, WEST, EAST, SEARCH, TAKE, BUY = range(7)
+DIRECTIONS_X = numpy.array([0, 0, -1, 1])
+DIRECTIONS_Y = numpy.array([-1, 1, 0, 0])
+POLICIES = ("random", "greedy")
+
+
+class Population:
+    def __init__(self, game, players, search_minutes=10, coffee_tiredness=5):
+        """
+        Creates a new Population: many players of the same game, each one a row of a set of NumPy arrays, that
+        are all stepped at once. The rules are those of Game, Player and Statistics, so the arrays always hold
+        what the same actions would do to that many Game objects.
+        Items are never dropped, so an item is either held or where it started. Every item found by a take
+        action is taken together, which takes no time, just as several takes in a row do.
+        :param game: a Game object that has not been played yet, it is not modified
+        :param players: integer number of players
+        :param search_minutes: (Optional) integer minutes a search takes on top of the player's tiredness,
+            so that the clock can be tuned. The game uses 10.
+        :param coffee_tiredness: (Optional) integer amount tiredness goes down by when buying coffee. The game uses 5.
+        :return: a Population object
+        """
+        world = game.world
+        statistics = game.statistics
+        self.search_minutes = search_minutes
+        self.coffee_tiredness = coffee_tiredness
+        # The map, one cell of padding on every side, so that a move off the edge is just a move onto a wall
+        width = max(len(row) for row in world.map)
+        self.grid = numpy.full((len(world.map) + 2, width + 2), -1, dtype=numpy.int32)
+        locations = list(world.locations.values())
+        for (x_value, y_value), location in world.locations.items():
+            self.grid[y_value + 1, x_value + 1] = location.index
+        self.points = numpy.array([location.points for location in locations], dtype=numpy.int32)
+        self.coffee = numpy.array([bool(location.coffee) for location in locations])
+        self.blocked_points = world.blocked.points
+        self.item_starts = numpy.array([world.locations[position].index for position in world.starts],
+                                       dtype=numpy.int32)
+        self.item_points = numpy.array([item.points for item in world.items], dtype=numpy.int32)
+        # Whether every item's target is the location, the only places the game can be won
+        self.targets = numpy.ones(len(locations), dtype=bool)
+        for item in world.items:
+            self.targets &= numpy.arange(len(locations)) == world.locations[item.target].index
+        self.exam = statistics.exam
+        self.players = players
+        self.x = numpy.full(players, game.player.x, dtype=numpy.int32)
+        self.y = numpy.full(players, game.player.y, dtype=numpy.int32)
+        self.tiredness = numpy.full(players, game.player.tiredness, dtype=numpy.int32)
+        self.clock = numpy.full(players, statistics.clock, dtype=numpy.int32)
+        self.score = numpy.full(players, statistics.score, dtype=numpy.int32)
+        self.moves = numpy.full(players, statistics.moves, dtype=numpy.int32)
+        self.turns = numpy.zeros(players, dtype=numpy.int32)
+        self.held = numpy.zeros((players, len(world.items)), dtype=bool)
+        self.visited = numpy.zeros((players, len(locations)), dtype=bool)
+        self.over = numpy.zeros(players, dtype=bool)
+        self.lost = numpy.zeros(players, dtype=bool)
+        # The game starts with a move onto the starting location
+        self.move(numpy.ones(players, dtype=bool), numpy.zeros(players, dtype=numpy.int32),
+                  numpy.zeros(players, dtype=numpy.int32))
+
+    def here(self):
+        """
+        :return: integer array of the index of every player's location
+        """
+        return self.grid[self.y + 1, self.x + 1]
+
+    def found(self, here):
+        """
+        :param here: integer array of the index of every player's location
+        :return: bool array with a row per player and a column per item, True where the item is at the player's
+            location and has not been taken
+        """
+        return (self.item_starts[None, :] == here[:, None]) & ~self.held
+
+    def move(self, mask, x_dist, y_dist):
+        """
+        Moves the players in mask, as Game.move does: a move onto a wall costs the same as any other, and leaves
+        the player where they were.
+        :param mask: bool array, True for the players that move
+        :param x_dist: integer array of the change in x of every player
+        :param y_dist: integer array of the change in y of every player
+        :return: none
+        """
+        rows = numpy.flatnonzero(mask)
+        x_new = self.x[rows] + x_dist[rows]
+        y_new = self.y[rows] + y_dist[rows]
+        target = self.grid[y_new + 1, x_new + 1]
+        opened = target >= 0
+        points = numpy.full(len(rows), self.blocked_points, dtype=numpy.int32)
+        points[opened] = numpy.where(self.visited[rows[opened], target[opened]], 0, self.points[target[opened]])
+        self.moves[rows] += 1
+        self.score[rows] += points
+        self.clock[rows] += self.tiredness[rows]
+        self.tiredness[rows] += 1
+        moved = rows[opened]
+        self.x[moved] = x_new[opened]
+        self.y[moved] = y_new[opened]
+        self.visited[moved, target[opened]] = True
+
+    def step(self, actions):
+        """
+        Carries out one action for every player whose game is not over, then checks every game as Game.check does.
+        :param actions: integer array of the action code of every player
+        :return: none
+        """
+        playing = ~self.over
+        self.turns[playing] += 1
+        moving = playing & (actions <= EAST)
+        direction = numpy.minimum(actions, EAST)
+        self.move(moving, DIRECTIONS_X[direction], DIRECTIONS_Y[direction])
+        searching = playing & (actions == SEARCH)
+        self.clock[searching] += self.tiredness[searching] + self.search_minutes
+        taking = playing & (actions == TAKE)
+        taken = self.found(self.here()) & taking[:, None]
+        self.held |= taken
+        self.score += taken.astype(numpy.int32) @ self.item_points
+        buying = playing & (actions == BUY)
+        distance = numpy.abs(30 - self.clock[buying] % 60)
+        self.clock[buying] += numpy.where(distance < 10, 10, numpy.where(distance < 20, 5, 15))
+        self.tiredness[buying] -= self.coffee_tiredness
+        self.check(playing)
+
+    def check(self, playing):
+        """
+        Ends the games of the players who have run out of time, or who hold every item at its target.
+        :param playing: bool array, True for the players whose game was not over before this turn
+        :return: none
+        """
+        late = playing & (self.clock >= self.exam)
+        won = playing & ~late & self.held.all(axis=1) & self.targets[self.here()]
+        self.over |= late | won
+        self.lost |= late
+
+    def choose(self, policy, rng):
+        """
+        :param policy: string name of how players choose their actions.
+            "random" picks uniformly from the moves, search, and take and buy when they are on the menu.
+            "greedy" takes every item it finds, buys coffee when its tiredness reaches the coffee tiredness, and
+            otherwise moves to a random neighbouring location.
+        :param rng: numpy.random.Generator object
+        :return: integer array of the action code of every player
+        """
+        here = self.here()
+        found = self.found(here).any(axis=1)
+        coffee = self.coffee[here]
+        if policy == "random":
+            # The menu always has the four moves and search, then take and buy when they apply
+            count = 5 + found + coffee
+            actions = (rng.random(self.players) * count).astype(numpy.int32)
+            return numpy.where(actions == 5, numpy.where(found, TAKE, BUY), actions)
+        if policy != "greedy":
+            raise ValueError("unknown policy {0!r}, expected one of {1}".format(policy, POLICIES))
+        # A random choice among the neighbours that are locations
+        opened = numpy.stack([self.grid[self.y + 1 + y_dist, self.x + 1 + x_dist] >= 0
+                              for x_dist, y_dist in zip(DIRECTIONS_X, DIRECTIONS_Y)], axis=1)
+        weights = rng.random((self.players, 4)) * opened
+        actions = weights.argmax(axis=1).astype(numpy.int32)
+        actions = numpy.where(coffee & (self.tiredness >= self.coffee_tiredness), BUY, actions)
+        return numpy.where(found, TAKE, actions)
+
+    def run(self, turns, policy="random", seed=0):
+        """
+        Plays every game until it is over, or for at most the given number of turns.
+        :param turns: integer most turns to play
+        :param policy: (Optional) string name of how players choose their actions, see choose
+        :param seed: (Optional) integer seed of the random number generator
+        :return: none
+        """
+        rng = numpy.random.default_rng(seed)
+        for turn in range(turns):
+            if self.over.all():
+                break
+            self.step(self.choose(policy, rng))
+
+    def summary(self):
+        """
+        :return: dictionary of the share of players who won (reached the exam with every item in time), lost and
+            have not finished, and the quartiles of the score of every player and of the finishing time (minute of
+            the day) of the winners
+        """
+        won = self.over & ~self.lost
+        report = {"players": self.players, "win_rate": float(won.mean()), "loss_rate": float(self.lost.mean()),
+                  "unfinished": float(1 - self.over.mean()),
+                  "score": numpy.percentile(self.score, [25, 50, 75]).tolist()}
+        if won.any():
+            report["finish"] = numpy.percentile(self.clock[won], [25, 50, 75]).tolist()
+        return report
+
+
+def str_minutes(minutes):
+    """
+    :param minutes: number of minutes since midnight
+    :return: string representation of the time in the format HH:MM
+    """
+    hour, minute = divmod(int(round(minutes)), 60)
+    return "{0}:{1:02}".format(hour, minute)
+
+
+def main():
+    """
+    Command line entry point, see python simulate.py --help.
+    :return: none
+    """
+    parser = argparse.ArgumentParser(description="Simulate many players of the bundled world at once.")
+    parser.add_argument("--players", type=int, default=100000)
+    parser.add_argument("--turns", type=int, default=1000)
+    parser.add_argument("--policy", choices=POLICIES, default="greedy")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--search-minutes", type=int, default=10)
+    parser.add_argument("--coffee-tiredness", type=int, default=5)
+    arguments = parser.parse_args()
+    population = Population(new_game(), arguments.players, arguments.search_minutes, arguments.coffee_tiredness)
+    population.run(arguments.turns, arguments.policy, arguments.seed)
+    report = population.summary()
+    print("Players:   ", report["players"])
+    print("Won:        {0:.2%}".format(report["win_rate"]))
+    print("Lost:       {0:.2%}".format(report["loss_rate"]))
+    print("Unfinished: {0:.2%}".format(report["unfinished"]))
+    print("Score:      {0} / {1} / {2}".format(*report["score"]))
+    if "finish" in report:
+        print("Finish:     {0} / {1} / {2}".format(*(str_minutes(minutes) for minutes in report["finish"])))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import gc
+import hashlib
+import marshal
+import math
+import os
+import sys
+import tempfile
+import time
+
+MAGIC = b"ADVSNAP"
+VERSION = 3
+DIGEST_SIZE = 32
+# Size and modification time of each of the four source files, 8 bytes each
+STAT_SIZE = 4 * 16
+HEADER_SIZE = len(MAGIC) + 2 + STAT_SIZE + DIGEST_SIZE
+
+
+def source_digest(filenames):
+    """
+    Computes a checksum of the contents of the source files a snapshot is compiled from.
+    :param filenames: list of names of the map, location, item and exam text files, in that order
+    :return: bytes digest of DIGEST_SIZE bytes
+    """
+    digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    for filename in filenames:
+        source_file = open(filename, "rb")
+        contents = source_file.read()
+        source_file.close()
+        digest.update(len(contents).to_bytes(8, "little"))
+        digest.update(contents)
+    return digest.digest()
+
+
+def source_stats(filenames):
+    """
+    Records the size and modification time of the source files a snapshot is compiled from, which is enough to
+    tell that they have not changed without reading them.
+    :param filenames: list of names of the map, location, item and exam text files, in that order
+    :return: bytes of STAT_SIZE bytes
+    """
+    stats = bytearray()
+    for filename in filenames:
+        status = os.stat(filename)
+        stats += status.st_size.to_bytes(8, "little") + status.st_mtime_ns.to_bytes(8, "little")
+    return bytes(stats)
+
+
+def compile_snapshot(map_name, location_name, item_name, exam_name, snapshot_name):
+    """
+    Parses the four text files with the regular loaders and writes everything they produce to one binary file.
+    The file starts with MAGIC, the format VERSION, the marshal version, the size and modification time of each
+    source file and a checksum of their contents, followed by the marshalled records.
+    :param map_name: string that gives name of text file in which map data is located
+    :param location_name: string that gives name of text file in which location data is located
+    :param item_name: string that gives name of text file in which item data is located
+    :param exam_name: string that gives name of text file in which exam data is located
+    :param snapshot_name: string that gives name of the snapshot file to write
+    :return: none
+    """
+    from game_data import World, Exam
+    sources = [map_name, location_name, item_name, exam_name]
+    # Taken before anything is read, so that a source changed while compiling is looked at again
+    stats = source_stats(sources)
+    digest = source_digest(sources)
+    world = World(map_name, location_name, item_name)
+    exam = Exam(exam_name)
+    blocked = world.blocked
+    locations = []
+    for position, location in world.locations.items():
+        x_value, y_value = position
+        locations.append((x_value, y_value, location.name, location.points, location.coffee,
+                          location.short, location.long))
+    # Items are kept in file order, so that World.items is the same however the world is loaded
+    items = []
+    for item, (x_value, y_value) in zip(world.items, world.starts):
+        items.append((x_value, y_value, item.name, item.points, item.target, item.description))
+    payload = {
+        "map": world.map,
+        "coordinates": world.coordinates,
+        "numbers": world.numbers,
+        "blocked": (blocked.name, blocked.points, blocked.coffee, blocked.short, blocked.long),
+        "locations": locations,
+        "items": items,
+        "exam": exam.exam,
+    }
+    # The file is replaced in one step, so a game starting meanwhile never reads half of it
+    partial = snapshot_name + ".tmp"
+    snapshot_file = open(partial, "wb")
+    snapshot_file.write(MAGIC + bytes([VERSION, marshal.version]) + stats + digest)
+    snapshot_file.write(marshal.dumps(payload))
+    snapshot_file.close()
+    os.replace(partial, snapshot_name)
+
+
+def read_snapshot(snapshot_name, sources):
+    """
+    Reads a compiled world snapshot if it exists, has this format version, is fresh and is whole. The sources
+    are only read and checksummed if their sizes or modification times have changed since it was compiled.
+    :param snapshot_name: string that gives name of the snapshot file
+    :param sources: list of names of the map, location, item and exam text files, in that order
+    :return: the dictionary of records to pass to World and Exam, or None if the text files must be read instead
+    """
+    if not os.path.exists(snapshot_name):
+        return None
+    snapshot_file = open(snapshot_name, "rb")
+    header = snapshot_file.read(HEADER_SIZE)
+    prefix = MAGIC + bytes([VERSION, marshal.version])
+    stats = header[len(prefix):len(prefix) + STAT_SIZE]
+    fresh = header[:len(prefix)] == prefix and len(header) == HEADER_SIZE
+    if fresh and stats != source_stats(sources):
+        # Touched or copied sources may still hold the same text
+        fresh = header[len(prefix) + STAT_SIZE:] == source_digest(sources)
+    if not fresh:
+        snapshot_file.close()
+        return None
+    contents = snapshot_file.read()
+    snapshot_file.close()
+    # The records are plain acyclic containers, so there is nothing for the collector to find while they are built
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return marshal.loads(contents)
+    except (EOFError, ValueError):
+        # A damaged snapshot is no worse than a stale one
+        return None
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def tile_world(scale, directory):
+    """
+    Writes a copy of the bundled world enlarged scale times, by laying copies of map.txt out in a grid.
+    Each copy keeps its own locations, items and targets, renumbered so that no two copies share a number.
+    :param scale: positive integer number of copies of the bundled world
+    :param directory: string that gives name of the directory to write map.txt, locations.txt, items.txt
+        and puzzle.txt into
+    :return: list of the names of the four files written
+    """
+    map_file = open("map.txt", "r")
+    tile = [[int(number) for number in line.split()] for line in map_file if line.strip()]
+    map_file.close()
+    stride = max(max(row) for row in tile) + 1
+    columns = math.ceil(math.sqrt(scale))
+    rows = math.ceil(scale / columns)
+    map_lines = []
+    for tile_row in range(rows):
+        for row in tile:
+            cells = []
+            for tile_column in range(columns):
+                copy = tile_row * columns + tile_column
+                for number in row:
+                    cells.append(number + copy * stride if number >= 0 and copy < scale else -1)
+            map_lines.append(" ".join(str(cell) for cell in cells))
+    location_file = open("locations.txt", "r")
+    blocked, locations = location_file.read().split("\nLOCATION ", 1)
+    location_file.close()
+    location_blocks = ("LOCATION " + locations).split("LOCATION ")[1:]
+    item_file = open("items.txt", "r")
+    item_blocks = item_file.read().split("ITEM ")[1:]
+    item_file.close()
+    location_text = [blocked + "\n"]
+    item_text = []
+    for copy in range(scale):
+        offset = copy * stride
+        for block in location_blocks:
+            number, rest = block.rstrip("\n").split("\n", 1)
+            location_text.append("LOCATION {0}\n{1}\n\n".format(int(number) + offset, rest))
+        for block in item_blocks:
+            number, name, points, target, rest = block.rstrip("\n").split("\n", 4)
+            item_text.append("ITEM {0}\n{1} {2}\n{3}\n{4}\n{5}\n\n".format(
+                int(number) + offset, name, copy, points, int(target) + offset, rest))
+    exam_file = open("puzzle.txt", "r")
+    exam_text = exam_file.read()
+    exam_file.close()
+    contents = ["\n".join(map_lines), "".join(location_text), "".join(item_text), exam_text]
+    filenames = [os.path.join(directory, name) for name in ("map.txt", "locations.txt", "items.txt", "puzzle.txt")]
+    for filename, text in zip(filenames, contents):
+        output_file = open(filename, "w")
+        output_file.write(text)
+        output_file.close()
+    return filenames
+
+
+def benchmark(scales):
+    """
+    Prints the cold-start time of World and Exam loaded from the text files and from a compiled snapshot,
+    for the bundled world enlarged by each of the given scales.
+    :param scales: list of positive integer scales
+    :return: none
+    """
+    from game_data import World, Exam
+    print("scale\tlocations\ttext (s)\tsnapshot (s)\tspeedup")
+    for scale in scales:
+        with tempfile.TemporaryDirectory() as directory:
+            sources = tile_world(scale, directory)
+            snapshot_name = os.path.join(directory, "world.snap")
+            compile_snapshot(*sources, snapshot_name)
+            gc.collect()
+            start = time.perf_counter()
+            world = World(*sources[:3])
+            Exam(sources[3])
+            text_time = time.perf_counter() - start
+            locations = len(world.locations)
+            del world
+            gc.collect()
+            start = time.perf_counter()
+            snapshot = read_snapshot(snapshot_name, sources)
+            World(*sources[:3], snapshot)
+            Exam(sources[3], snapshot)
+            snapshot_time = time.perf_counter() - start
+            print("{0}\t{1}\t{2:.4f}\t{3:.4f}\t{4:.1f}x".format(
+                scale, locations, text_time, snapshot_time, text_time / snapshot_time))
+
+
+def main(arguments):
+    """
+    Command line entry point.
+        python snapshot.py compile       compiles the bundled world into world.snap
+        python snapshot.py bench [N ...] benchmarks cold start at the given scales (default 1 100 10000)
+    :param arguments: list of command line arguments
+    :return: none
+    """
+    if arguments[:1] == ["compile"]:
+        compile_snapshot("map.txt", "locations.txt", "items.txt", "puzzle.txt", "world.snap")
+    elif arguments[:1] == ["bench"]:
+        scales = [int(scale) for scale in arguments[1:]] or [1, 100, 10000]
+        benchmark(scales)
+    else:
+        print(main.__doc__)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
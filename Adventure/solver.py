@@ -0,0 +1,438 @@
+import collections
+import heapq
+import sys
+
+from adventure import DIRECTIONS, new_game
+from replay import replay
+
+
+class Route:
+    def __init__(self, commands, finish, optimal, expanded):
+        """
+        Creates a new Route object, the result of a search.
+        :param commands: list of strings, the transcript in the format of solution.txt
+        :param finish: integer minute of the day at which the last item reaches its target
+        :param optimal: bool value, True if the search was never cut short by its memory budget
+        :param expanded: integer number of states the search expanded
+        :return: a Route object
+        """
+        self.commands = commands
+        self.finish = finish
+        self.optimal = optimal
+        self.expanded = expanded
+
+    def str_finish(self):
+        """
+        Returns the finishing time in the format HH:MM
+        :return: string representation of the finishing time
+        """
+        return "{0}:{1:02}".format(*divmod(self.finish, 60))
+
+
+def coffee_time(minute):
+    """
+    Mirrors Statistics.buy_coffee.
+    :param minute: integer minute of the day at which the coffee is bought
+    :return: integer number of minutes buying the coffee takes
+    """
+    distance = abs(30 - minute % 60)
+    if distance < 10:
+        return 10
+    elif distance < 20:
+        return 5
+    return 15
+
+
+def distances(world, source):
+    """
+    Finds the number of moves from source to every location reachable from it.
+    :param world: a World object
+    :param source: tuple representation of a position on the map
+    :return: dictionary keyed by position of the least number of moves needed to get there
+    """
+    found = {source: 0}
+    queue = collections.deque([source])
+    while queue:
+        x_pos, y_pos = position = queue.popleft()
+        for x_dist, y_dist in DIRECTIONS.values():
+            neighbour = (x_pos + x_dist, y_pos + y_dist)
+            if neighbour not in found and world.is_location(neighbour):
+                found[neighbour] = found[position] + 1
+                queue.append(neighbour)
+    return found
+
+
+class Solver:
+    def __init__(self, game):
+        """
+        Creates a new Solver for a game that has not been played yet.
+        The state of a search is (x, y, tiredness, items carried, minute of the day).
+        Searching is never part of a fastest route: a search costs at least 10 minutes while coffee prices differ
+        by at most 10, so waiting never makes a coffee cheaper. A move into a wall costs the same minutes as a
+        move and leaves the player where they were, so it only helps by changing the minute a coffee is bought at.
+        It takes the same time before or after any other move, so it is only tried where coffee is sold. Taking
+        an item costs nothing, so every item is taken as soon as its location is reached, and nothing is ever
+        dropped.
+        Coffee is only bought while tiredness is at least 5. Below that, a coffee makes tiredness negative
+        and moves then turn the clock back, so there would be no fastest route at all.
+        :param game: a Game object, it is not modified
+        :return: a Solver object
+        """
+        self.world = game.world
+        self.start = game.player.get_position()
+        self.tiredness = game.player.get_tiredness()
+        statistics = game.statistics
+        self.clock = statistics.clock
+        self.deadline = statistics.exam
+        self.answers = [answer for question, answer in game.final_exam.exam]
+        self.items = []
+        self.at = {}
+        for position, items in game.world_state.items.items():
+            for item in items:
+                self.at[position] = self.at.get(position, 0) | 1 << len(self.items)
+                self.items.append((position, item.get_name(), item.get_target_position()))
+        self.full = (1 << len(self.items)) - 1
+        targets = set(target for position, name, target in self.items)
+        self.target = targets.pop() if len(targets) == 1 else None
+        self.coffee = any(location.has_coffee() for location in self.world.locations.values())
+        self.reach = {}
+        for position, name, target in self.items:
+            if position not in self.reach:
+                self.reach[position] = distances(self.world, position)
+        self.item_distances = [self.reach[position] for position, name, target in self.items]
+        self.target_distances = distances(self.world, self.target) if self.target is not None else {}
+        self.trees = {}
+        self.bounds = {}
+        self.order = []
+        self.legs = []
+
+    def moves_needed(self, position, carried):
+        """
+        A lower bound on the moves left: a walk from position that picks up every item not yet carried and ends at
+        the target is at least as long as the way to the nearest of those items plus a spanning tree of the rest.
+        It is also at least as long as the detour through any one of them.
+        :param position: tuple representation of the player's position
+        :param carried: integer bit mask of the items carried
+        :return: integer number of moves, or None if the target can no longer be reached
+        """
+        needed = self.target_distances.get(position)
+        if needed is None or carried == self.full:
+            return needed
+        nearest = None
+        for index, distance in enumerate(self.item_distances):
+            if not carried >> index & 1:
+                to_item = distance.get(position)
+                if to_item is None:
+                    return None
+                needed = max(needed, to_item + distance[self.target])
+                if nearest is None or to_item < nearest:
+                    nearest = to_item
+        if carried not in self.trees:
+            self.trees[carried] = self.spanning_tree(carried)
+        return max(needed, nearest + self.trees[carried])
+
+    def spanning_tree(self, carried):
+        """
+        Finds the weight of a minimum spanning tree (Prim's algorithm) over the target and the locations of the
+        items not yet carried, where every edge weighs the number of moves between its ends.
+        :param carried: integer bit mask of the items carried
+        :return: integer number of moves
+        """
+        nodes = set(position for index, (position, name, target) in enumerate(self.items)
+                    if not carried >> index & 1)
+        nodes.discard(self.target)
+        reach = self.target_distances
+        cheapest = {node: reach[node] for node in nodes}
+        total = 0
+        while cheapest:
+            node = min(cheapest, key=cheapest.get)
+            total += cheapest.pop(node)
+            reach = self.reach[node]
+            for other in cheapest:
+                if reach[other] < cheapest[other]:
+                    cheapest[other] = reach[other]
+        return total
+
+    def time_needed(self, tiredness, moves):
+        """
+        A lower bound on the minutes that moves more moves take when starting at the given tiredness.
+        It assumes any coffees are bought straight away, take 5 minutes each and can be bought anywhere.
+        :param tiredness: integer tiredness of the player
+        :param moves: integer number of moves still to make
+        :return: integer number of minutes
+        """
+        key = (tiredness, moves)
+        if key not in self.bounds:
+            best = None
+            coffees = (tiredness + moves) // 5 + 1 if self.coffee else 0
+            for bought in range(coffees + 1):
+                start = tiredness - 5 * bought
+                if start >= 0:
+                    walking = moves * start + moves * (moves - 1) // 2
+                else:
+                    tired_moves = max(0, moves + start)
+                    walking = tired_moves * (tired_moves - 1) // 2
+                total = 5 * bought + walking
+                if best is None or total < best:
+                    best = total
+            self.bounds[key] = best
+        return self.bounds[key]
+
+    def arrive(self, position, carried):
+        """
+        Takes every item at position.
+        :param position: tuple representation of the position reached
+        :param carried: integer bit mask of the items carried before arriving
+        :return: integer bit mask of the items carried after taking everything there
+        """
+        return carried | self.at.get(position, 0)
+
+    def between(self, first, second):
+        """
+        :param first: tuple representation of the start, the target or the location of an item
+        :param second: tuple representation of the start, the target or the location of an item
+        :return: integer number of moves from first to second
+        """
+        if second in self.reach:
+            return self.reach[second][first]
+        if first in self.reach:
+            return self.reach[first][second]
+        return self.target_distances[first if second == self.target else second]
+
+    def plan_order(self):
+        """
+        Picks an order in which to visit the locations of the items, short in moves: nearest neighbour first,
+        then improved with 2-opt, with the start and the target fixed at either end.
+        :return: list of the positions of the items, each once, in the order to visit them
+        """
+        order = []
+        current = self.start
+        left = set(self.reach)
+        while left:
+            current = min(left, key=lambda position: (self.between(current, position), position))
+            order.append(current)
+            left.remove(current)
+        path = [self.start] + order + [self.target]
+        improved = True
+        while improved:
+            improved = False
+            for first in range(1, len(path) - 2):
+                for last in range(first + 1, len(path) - 1):
+                    before = self.between(path[first - 1], path[first]) + self.between(path[last], path[last + 1])
+                    after = self.between(path[first - 1], path[last]) + self.between(path[first], path[last + 1])
+                    if after < before:
+                        path[first:last + 1] = reversed(path[first:last + 1])
+                        improved = True
+        return path[1:-1]
+
+    def follow(self, position, stage):
+        """
+        Moves on to the next location in self.order once it has been reached.
+        :param position: tuple representation of the position reached
+        :param stage: integer number of locations of self.order visited so far
+        :return: integer number of locations of self.order visited after arriving
+        """
+        while stage < len(self.order) and self.order[stage] == position:
+            stage += 1
+        return stage
+
+    def moves_along(self, position, stage):
+        """
+        The least number of moves left when the locations of self.order are visited in order.
+        :param position: tuple representation of the player's position
+        :param stage: integer number of locations of self.order visited so far
+        :return: integer number of moves, or None if the target can no longer be reached
+        """
+        if stage == len(self.order):
+            return self.target_distances.get(position)
+        to_next = self.reach[self.order[stage]].get(position)
+        if to_next is None:
+            return None
+        return to_next + self.legs[stage]
+
+    def successors(self, state, advance):
+        """
+        :param state: tuple (x, y, tiredness, progress, minute)
+        :param advance: function of the position reached and the progress before, returning the progress after
+        :return: generator of (command, next state) pairs, where command is "buy" or one of the "go" commands
+        """
+        x_pos, y_pos, tiredness, progress, clock = state
+        coffee = self.world.get_location((x_pos, y_pos)).has_coffee()
+        if tiredness >= 5 and coffee:
+            yield "buy", (x_pos, y_pos, tiredness - 5, progress, clock + coffee_time(clock))
+        for direction, (x_dist, y_dist) in DIRECTIONS.items():
+            position = (x_pos + x_dist, y_pos + y_dist)
+            if self.world.is_location(position):
+                yield "go " + direction, position + (tiredness + 1, advance(position, progress), clock + tiredness)
+            elif coffee:
+                # Into a wall, to wait for a cheaper coffee
+                yield "go " + direction, (x_pos, y_pos, tiredness + 1, progress, clock + tiredness)
+
+    def solve(self, limit=1000000, prune=True):
+        """
+        Finds the earliest time at which every item is carried to its target.
+        First runs A* over states whose progress is the set of items carried. If that needs more than limit
+        states (which happens with more than a dozen or so items), it falls back to A* over states whose progress
+        is how far along a fixed, short order of the item locations the player is, which grows linearly with
+        the number of items. The fallback's route is the fastest one for that order, not necessarily overall.
+        :param limit: integer budget on the number of states kept in memory. If even the fallback goes past it,
+            only the most promising half of its queue is kept each time.
+        :param prune: bool value, True to skip any state for which an expanded state at the same position with
+            the same progress was no later and no more tired. Arriving earlier can hurt when buying coffee
+            (arriving at :10 is served later than arriving at :15), so where coffee is sold the expanded state must
+            also be just as tired and at the same minute past the hour. The search stays exact either way.
+        :return: a Route object, or None if the items cannot all be delivered before the exam
+        """
+        if self.target is None:
+            return None
+        route = self.search(self.arrive, self.moves_needed, self.full, limit, prune, True)
+        if route is not False:
+            return route
+        self.order = self.plan_order()
+        path = self.order + [self.target]
+        self.legs = [0] * len(self.order)
+        for stage in range(len(self.order) - 1, -1, -1):
+            self.legs[stage] = self.between(path[stage], path[stage + 1]) + (self.legs[stage + 1]
+                                                                             if stage + 1 < len(self.order) else 0)
+        return self.search(self.follow, self.moves_along, len(self.order), limit, prune, False)
+
+    def search(self, advance, moves_needed, finished, limit, prune, exact):
+        """
+        Runs A* with the minute of the day as the cost, from the start of the game until the player is at the
+        target with the given progress.
+        :param advance: function of a position reached and the progress before, returning the progress after
+        :param moves_needed: function of a position and progress, returning a lower bound on the moves left
+            or None if the target cannot be reached
+        :param finished: the progress of a player carrying every item
+        :param limit: integer budget on the number of states kept in memory
+        :param prune: bool value, True to skip states dominated by an expanded one (see solve)
+        :param exact: bool value, True to give up once the budget is reached, False to keep the most promising
+            half of the queue and carry on
+        :return: a Route object, None if there is no route, or False if the search gave up
+        """
+        x_pos, y_pos = self.start
+        # The game starts with a move onto the starting location
+        start = (x_pos, y_pos, self.tiredness + 1, advance(self.start, 0), self.clock + self.tiredness)
+        parents = {start: None}
+        frontiers = {}
+        queue = []
+        pushed = 0
+        optimal = exact
+        expanded = 0
+        heapq.heappush(queue, (start[4], -start[4], 0, start))
+        while queue:
+            # Among equally promising states, the one furthest along is expanded first
+            estimate, furthest, order, state = heapq.heappop(queue)
+            x_pos, y_pos, tiredness, progress, clock = state
+            if clock >= self.deadline:
+                continue
+            if progress == finished and (x_pos, y_pos) == self.target:
+                return Route(self.transcript(parents, state), clock, optimal, expanded)
+            if prune and self.coffee:
+                # How long coffee takes depends on the minute it is bought at, so a state is only sure to do no
+                # worse than another if it is just as tired, at the same minute past the hour, and no later
+                key = (x_pos, y_pos, progress, tiredness, clock % 60)
+                if frontiers.get(key, clock + 1) <= clock:
+                    continue
+                frontiers[key] = clock
+            elif prune:
+                frontier = frontiers.setdefault((x_pos, y_pos, progress), [])
+                if any(seen_clock <= clock and seen_tiredness <= tiredness
+                       for seen_tiredness, seen_clock in frontier):
+                    continue
+                frontier.append((tiredness, clock))
+            expanded += 1
+            for command, following in self.successors(state, advance):
+                if following in parents:
+                    continue
+                moves = moves_needed(following[:2], following[3])
+                if moves is None:
+                    continue
+                estimate = following[4] + self.time_needed(following[2], moves)
+                if estimate >= self.deadline:
+                    continue
+                parents[following] = (state, command)
+                pushed += 1
+                heapq.heappush(queue, (estimate, -following[4], pushed, following))
+            if len(parents) > limit:
+                if exact:
+                    return False
+                queue = heapq.nsmallest(len(queue) // 2, queue)
+                heapq.heapify(queue)
+                kept = set(entry[3] for entry in queue)
+                parents = self.keep_paths(parents, kept)
+                frontiers.clear()
+        return None
+
+    def keep_paths(self, parents, kept):
+        """
+        Drops every remembered state that is not on the path to one of the kept states.
+        :param parents: dictionary keyed by state of (previous state, command) or None for the start
+        :param kept: set of states still waiting to be expanded
+        :return: a new, smaller parents dictionary
+        """
+        smaller = {}
+        for state in kept:
+            while state is not None and state not in smaller:
+                smaller[state] = parents[state]
+                state = parents[state][0] if parents[state] is not None else None
+        return smaller
+
+    def transcript(self, parents, state):
+        """
+        Rebuilds the commands that lead to state, adding a take for every item picked up and the exam answers.
+        :param parents: dictionary keyed by state of (previous state, command) or None for the start
+        :param state: the winning state
+        :return: list of strings, the transcript in the format of solution.txt
+        """
+        steps = []
+        while parents[state] is not None:
+            previous, command = parents[state]
+            steps.append((command, state))
+            state = previous
+        carried = self.arrive(self.start, 0)
+        commands = self.takes(0, carried)
+        for command, state in reversed(steps):
+            commands.append(command)
+            taken = self.arrive(state[:2], carried)
+            commands += self.takes(carried, taken)
+            carried = taken
+        return commands + self.answers + ["no"]
+
+    def takes(self, before, after):
+        """
+        :param before: integer bit mask of the items carried before a command
+        :param after: integer bit mask of the items carried after it
+        :return: list of the take commands and item names that pick up the difference, in location order
+        """
+        commands = []
+        for index, (position, name, target) in enumerate(self.items):
+            if (after & ~before) >> index & 1:
+                commands += ["take", name]
+        return commands
+
+
+def main(arguments):
+    """
+    Solves the bundled world and prints the transcript, or writes it to the file named by the first argument.
+    The transcript is replayed before it is written to make sure it really wins.
+    :param arguments: list of command line arguments
+    :return: none
+    """
+    route = Solver(new_game()).solve()
+    if route is None:
+        print("There is no way to deliver every item before the exam.")
+        return
+    result = replay(new_game(), route.commands)
+    assert result.won and result.time == route.str_finish(), result
+    if arguments:
+        output_file = open(arguments[0], "w")
+        output_file.write("\n".join(route.commands))
+        output_file.close()
+    else:
+        print("\n".join(route.commands))
+    print("Finished at", route.str_finish(), "after expanding", route.expanded, "states", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
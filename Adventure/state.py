@@ -0,0 +1,140 @@
+import copy
+import marshal
+
+from game_data import Inventory
+
+VERSION = 2
+
+
+def dump_state(game):
+    """
+    Packs everything that changes while a game is played into a compact binary record: the player's position,
+    tiredness and inventory, the statistics, which locations have been visited, where every item is, and the
+    progress of the exam, and which world events have fired and what they changed. The static world (map, text,
+    item data, event schedule) is left out, so the record is only a few bytes per item plus one bit per location.
+    Items are recorded by their index in World.items and locations by their index in World.locations.
+    :param game: a Game object
+    :return: bytes of the record
+    """
+    world = game.world
+    player = game.player
+    statistics = game.statistics
+    final_exam = game.final_exam
+    world_state = game.world_state
+    index = {id(item): number for number, item in enumerate(world.items)}
+    placements = []
+    for position, items in world_state.items.items():
+        placements.append(world.locations[position].index)
+        placements.append(tuple(index[id(item)] for item in items))
+    record = (VERSION, len(world.locations), world.total_items,
+              player.x, player.y, player.tiredness,
+              tuple(index[id(item)] for item in player.inventory),
+              statistics.score, statistics.moves, statistics.clock,
+              game.questions, game.over, game.lost,
+              final_exam.number, final_exam.correct, final_exam.incorrect,
+              bytes(world_state.visited), tuple(placements),
+              tuple(world.locations[position].index for position in world_state.closed),
+              tuple(game.timeline.get_pending()))
+    return marshal.dumps(record)
+
+
+def restore_state(game, data):
+    """
+    Puts game back into the state recorded by dump_state.
+    :param game: a Game object with the same world as the one the record was taken from, in any state. Its world
+        must not be shared (see multiplayer.share), as the items in it belong to every player.
+    :param data: bytes of the record
+    :return: none
+    """
+    if getattr(game.world_state, "shared", None) is not None:
+        raise ValueError("a game in a shared world cannot be restored, its items belong to every player")
+    record = marshal.loads(data)
+    if record[0] != VERSION:
+        raise ValueError("state record has version {0}, expected {1}".format(record[0], VERSION))
+    (version, location_count, total_items,
+     x_value, y_value, tiredness, inventory,
+     score, moves, clock,
+     questions, over, lost,
+     number, correct, incorrect,
+     visited, placements, closed, pending) = record
+    world = game.world
+    if location_count != len(world.locations) or total_items != world.total_items:
+        raise ValueError("state record was taken from a different world")
+    if any(not 0 <= event < len(game.timeline.script) for event in pending):
+        raise ValueError("state record has events that are not in the schedule of this game")
+    player = game.player
+    player.x = x_value
+    player.y = y_value
+    player.tiredness = tiredness
+    player.inventory = Inventory()
+    player.targets = {}
+    for item_number in inventory:
+        player.add_item(world.items[item_number])
+    statistics = game.statistics
+    statistics.score = score
+    statistics.moves = moves
+    statistics.clock = clock
+    game.questions = questions
+    game.over = over
+    game.lost = lost
+    final_exam = game.final_exam
+    final_exam.number = number
+    final_exam.correct = correct
+    final_exam.incorrect = incorrect
+    world_state = game.world_state
+    world_state.visited = bytearray(visited)
+    world_state.items = {}
+    for place in range(0, len(placements), 2):
+        position = world.get_position(placements[place])
+        for item_number in placements[place + 1]:
+            world_state.add_item(position, world.items[item_number])
+    world_state.closed = set(world.get_position(number) for number in closed)
+    game.timeline.set_pending(pending)
+
+
+def fork(game):
+    """
+    Branches a game: makes a new Game in the same state that can then be played independently.
+    Only the mutable state is copied: the player, the statistics, the progress of the exam, the WorldState and the
+    events still to fire.
+    The World itself and the exam questions are shared with the original, which makes this much cheaper than
+    copy.deepcopy, and the new game only takes up a few bytes per location and item.
+    :param game: a Game object
+    :return: a new Game object
+    """
+    branch = copy.copy(game)
+    branch.player = copy.copy(game.player)
+    branch.player.inventory = game.player.inventory.copy()
+    branch.player.targets = dict(game.player.targets)
+    branch.statistics = copy.copy(game.statistics)
+    branch.final_exam = copy.copy(game.final_exam)
+    branch.world_state = game.world_state.copy()
+    branch.timeline = game.timeline.copy()
+    return branch
+
+
+def park(game, filename):
+    """
+    Writes the state of game to filename, so that the game can be dropped from memory.
+    :param game: a Game object
+    :param filename: string that gives the name of the file to write
+    :return: none
+    """
+    state_file = open(filename, "wb")
+    state_file.write(dump_state(game))
+    state_file.close()
+
+
+def unpark(template, filename):
+    """
+    Brings back a game parked by park.
+    :param template: a Game object with the same world as the parked game, it is not modified
+    :param filename: string that gives the name of the file written by park
+    :return: a new Game object in the parked state
+    """
+    state_file = open(filename, "rb")
+    data = state_file.read()
+    state_file.close()
+    game = fork(template)
+    restore_state(game, data)
+    return game
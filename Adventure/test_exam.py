@@ -0,0 +1,33 @@
+import unittest
+
+from game_data import parse_answer, is_correct
+
+
+class AnswerTest(unittest.TestCase):
+    def test_trailing_zero(self):
+        # 1.0380 used to be compared with the key 1.038 as a string, and marked wrong
+        key = parse_answer("1.038")
+        self.assertTrue(is_correct(key, "1.0380"))
+        self.assertTrue(is_correct(key, " 1.038 "))
+        self.assertTrue(is_correct(key, "+1.038"))
+        self.assertFalse(is_correct(key, "1.039"))
+
+    def test_python_spellings(self):
+        key = parse_answer("3900")
+        self.assertTrue(is_correct(key, "3900"))
+        self.assertTrue(is_correct(key, "3900.0"))
+        for answer in ("3_900", "3.9e3", "0x3900", "٣٩٠٠", "3900.", ".3900e4"):
+            self.assertFalse(is_correct(key, answer), answer)
+        for answer in ("inf", "nan", "-Infinity"):
+            self.assertEqual(parse_answer(answer), (answer, None))
+            self.assertFalse(is_correct(parse_answer(answer), "1"))
+        self.assertTrue(is_correct(parse_answer("nan"), "nan"))
+
+    def test_text_answers(self):
+        key = parse_answer("Feynman")
+        self.assertTrue(is_correct(key, " Feynman"))
+        self.assertFalse(is_correct(key, "feynman"))
+
+
+if __name__ == "__main__":
+    unittest.main()
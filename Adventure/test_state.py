@@ -0,0 +1,48 @@
+import os
+import unittest
+
+from adventure import Game
+from events import NullRenderer
+from state import dump_state, restore_state, fork
+from timeline import close_coffee
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def bundled_game():
+    """
+    :return: a new Game of the bundled world, as new_game makes it, whatever the current directory is
+    """
+    names = [os.path.join(DIRECTORY, name) for name in ("map.txt", "locations.txt", "items.txt", "puzzle.txt")]
+    return Game(*names, 2, 3, 8, 0, 13, 0, output=NullRenderer())
+
+
+class ForkTest(unittest.TestCase):
+    def test_schedule_is_not_shared(self):
+        template = bundled_game()
+        branch = fork(template)
+        other = fork(template)
+        branch.timeline.schedule(8, 30, close_coffee, (0, 0))
+        self.assertEqual(branch.timeline.get_pending(), [0])
+        self.assertEqual(template.timeline.get_pending(), [])
+        self.assertEqual(other.timeline.get_pending(), [])
+        template.timeline.reset()
+        template.timeline.advance(template, 9 * 60)
+        self.assertEqual(template.world_state.closed, set())
+
+    def test_restore_rejects_unknown_events(self):
+        branch = fork(bundled_game())
+        branch.timeline.schedule(8, 30, close_coffee, (0, 0))
+        with self.assertRaisesRegex(ValueError, "schedule"):
+            restore_state(bundled_game(), dump_state(branch))
+
+    def test_restore_keeps_pending_events(self):
+        game = bundled_game()
+        game.timeline.schedule(8, 30, close_coffee, (0, 0))
+        branch = fork(game)
+        restore_state(branch, dump_state(game))
+        self.assertEqual(branch.timeline.get_pending(), [0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import collections
+import os
+import random
+import tempfile
+import unittest
+
+from adventure import Game, DIRECTIONS, dispatch
+from events import NullRenderer
+from generator import generate
+from state import dump_state, restore_state
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+# Random steps taken in each world
+STEPS = 20000
+
+
+def scan(game):
+    """
+    The win check as it was before the player kept count of the targets of the items held: every item of the world
+    is held, and every item held has its target where the player is.
+    :param game: a Game object
+    :return: True if the game is won where the player stands, False otherwise
+    """
+    position = game.player.get_position()
+    held = list(game.player.get_inventory())
+    return len(held) == game.world.get_total_items() and all(item.target == position for item in held)
+
+
+def distances(world, goal):
+    """
+    :param world: a World object
+    :param goal: Tuple representation of the position of a location on the map
+    :return: dictionary of the number of moves from every location to goal, keyed by position
+    """
+    found = {goal: 0}
+    queue = collections.deque([goal])
+    while queue:
+        position = queue.popleft()
+        for x_dist, y_dist in DIRECTIONS.values():
+            neighbour = (position[0] + x_dist, position[1] + y_dist)
+            if world.is_location(neighbour) and neighbour not in found:
+                found[neighbour] = found[position] + 1
+                queue.append(neighbour)
+    return found
+
+
+class WinTest(unittest.TestCase):
+    def wander(self, game, seed):
+        """
+        Plays random commands through dispatch, as a player would, checking after every one that Game.check agrees
+        with the old inventory scan and that the player is still at a location. Most commands head for a win: they
+        take an item that is here, or move one step towards the nearest item that lies somewhere or, once every item
+        is held, towards a target. The others move in any direction (into walls too), take or drop (an item that is
+        there, or one that is not), or buy coffee where it is sold. Now and then, and whenever the game is over, a
+        state recorded earlier is restored.
+        :param game: a Game object that has not been played yet
+        :param seed: integer seed of the random number generator
+        :return: integer number of commands after which the game was won
+        """
+        rng = random.Random(seed)
+        world = game.world
+        names = [item.get_name() for item in world.items] + ["nothing"]
+        routes = {}
+        records = [dump_state(game)]
+        wins = 0
+        for step in range(STEPS):
+            position = game.player.get_position()
+            held = list(game.player.get_inventory())
+            here = [item.get_name() for item in game.world_state.get_items(position)]
+            roll = rng.random()
+            if roll < 0.1:
+                dispatch(game, "go " + rng.choice(sorted(DIRECTIONS)))
+            elif roll < 0.15:
+                dispatch(game, "drop", rng.choice(held).get_name() if held and rng.random() < 0.9
+                         else rng.choice(names))
+            elif roll < 0.2:
+                dispatch(game, "take", rng.choice(names))
+            elif roll < 0.25 and game.world_state.has_coffee(position):
+                dispatch(game, "buy")
+            elif here and len(held) < world.get_total_items():
+                dispatch(game, "take", rng.choice(here))
+            else:
+                if len(held) < world.get_total_items():
+                    goals = sorted(game.world_state.items)
+                else:
+                    goals = [rng.choice(held).target]
+                for goal in goals:
+                    if goal not in routes:
+                        routes[goal] = distances(world, goal)
+                route = routes[min(goals, key=lambda goal: routes[goal][position])]
+                action = min(DIRECTIONS, key=lambda direction: route.get(
+                    (position[0] + DIRECTIONS[direction][0], position[1] + DIRECTIONS[direction][1]), len(route)))
+                dispatch(game, "go " + action)
+            game.check()
+            self.assertTrue(world.is_location(game.player.get_position()), "step {0}: off the map".format(step))
+            if not game.statistics.is_past_exam():
+                won = scan(game)
+                self.assertEqual(game.over, won, "step {0}: the count and the scan disagree".format(step))
+                wins += won
+            if game.over or rng.random() < 0.02:
+                restore_state(game, rng.choice(records))
+            elif rng.random() < 0.05:
+                records.append(dump_state(game))
+        return wins
+
+    def test_bundled_world(self):
+        names = [os.path.join(DIRECTORY, name) for name in ("map.txt", "locations.txt", "items.txt", "puzzle.txt")]
+        game = Game(*names, 2, 3, 8, 0, 13, 0, output=NullRenderer())
+        self.assertGreater(self.wander(game, 0), 0)
+
+    def test_generated_world(self):
+        with tempfile.TemporaryDirectory() as directory:
+            x_value, y_value = generate(directory, 8, 8, items=4, seed=7)
+            names = [os.path.join(directory, name) for name in ("map.txt", "locations.txt", "items.txt",
+                                                                "puzzle.txt")]
+            game = Game(*names, x_value, y_value, 8, 0, 13, 0, output=NullRenderer())
+            self.assertGreater(self.wander(game, 1), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,302 @@
+import array
+import collections.abc
+import marshal
+import sys
+import threading
+import zlib
+
+from game_data import World, Location, Item
+
+VERSION = 1
+# Width and height in cells of a tile
+SIZE = 32
+# Tiles kept in memory at once
+CAPACITY = 64
+# Positions read at a time when iterating over every location
+BATCH = 4096
+
+
+def compile_tiles(world, filename, size=SIZE):
+    """
+    Writes a world to a tiled file that TiledWorld reads a tile at a time. The map is cut into size by size tiles
+    and every tile that has a location in it is written as one zlib-compressed marshal record, holding the number,
+    exits, index, name, points, coffee and descriptions of each of its locations. Tiles of nothing but walls are
+    left out altogether. The file starts with a marshalled header: ("tiles", VERSION), the tile size, the number of
+    locations, the BLOCKED location, the items, where each tile is, and where the list of every location's position
+    in index order is. The offsets are from the end of the header.
+    :param world: a World object, loaded in any way
+    :param filename: string that gives the name of the file to write
+    :param size: (Optional) integer width and height in cells of a tile
+    :return: integer number of tiles written
+    """
+    tiles = {}
+    positions = array.array("i")
+    for position, location in world.locations.items():
+        x_value, y_value = position
+        tiles.setdefault((x_value // size, y_value // size), []).append(
+            (x_value, y_value, location.index, world.get_number(position), world.get_exits(position),
+             location.get_name(), location.points, location.coffee, location.get_description(True),
+             location.get_long_description()))
+        positions.append(x_value)
+        positions.append(y_value)
+    blocked = world.blocked
+    items = []
+    for item, (x_value, y_value) in zip(world.items, world.starts):
+        items.append((x_value, y_value, item.name, item.points, item.target, item.description))
+    index = {}
+    records = []
+    offset = 0
+    for key, locations in tiles.items():
+        record = zlib.compress(marshal.dumps(tuple(locations)))
+        index[key] = (offset, len(record))
+        records.append(record)
+        offset += len(record)
+    header = (("tiles", VERSION), size, len(world.locations),
+              (blocked.name, blocked.points, blocked.coffee, blocked.get_description(True),
+               blocked.get_long_description()),
+              items, index, (offset, len(positions) * positions.itemsize))
+    tile_file = open(filename, "wb")
+    marshal.dump(header, tile_file)
+    for record in records:
+        tile_file.write(record)
+    tile_file.write(positions.tobytes())
+    tile_file.close()
+    return len(records)
+
+
+class Tiles(collections.abc.Mapping):
+    def __init__(self, filename, capacity=CAPACITY):
+        """
+        Creates a new Tiles: the locations of a tiled file (see compile_tiles), as a read-only dictionary of Location
+        objects keyed by position that can stand in for World.locations. A tile is read from the file the first
+        time a position in it is asked about, and the least recently used tile is dropped once more than capacity
+        are held, so memory depends on the area being played in rather than on the size of the world.
+        Iterating goes through every location in index order, reading tiles as it needs them.
+        :param filename: string that gives the name of the tiled file
+        :param capacity: (Optional) integer number of tiles held at most
+        :return: a Tiles object
+        """
+        self.file = open(filename, "rb")
+        header = marshal.load(self.file)
+        if header[0] != ("tiles", VERSION):
+            self.file.close()
+            raise ValueError("{0} is not a version {1} tiled world".format(filename, VERSION))
+        self.base = self.file.tell()
+        tag, self.size, self.count, self.blocked, self.records, self.index, self.positions = header
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        # Tiles held, least recently used first, keyed by tile; each is a tuple of the dictionaries of the Location
+        # objects, exit masks and location numbers of the tile, keyed by position
+        self.cache = collections.OrderedDict()
+        # The last tile used, looked at before the cache, as the player usually stays on one tile for many turns
+        self.last = (None, None)
+        self.loads = 0
+        self.evictions = 0
+
+    def tile(self, position):
+        """
+        :param position: Tuple representation of a position on the map
+        :return: tuple of the dictionaries of the Location objects, exit masks and location numbers of the tile
+            position is on, keyed by position, or None if that tile has no locations
+        """
+        key = (position[0] // self.size, position[1] // self.size)
+        last_key, last = self.last
+        if key == last_key:
+            return last
+        if key not in self.index:
+            return None
+        with self.lock:
+            tile = self.cache.get(key)
+            if tile is None:
+                tile = self.load(key)
+                self.cache[key] = tile
+                if len(self.cache) > self.capacity:
+                    self.cache.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self.cache.move_to_end(key)
+            self.last = (key, tile)
+        return tile
+
+    def load(self, key):
+        """
+        Reads a tile from the file.
+        :param key: tuple of the column and row of the tile
+        :return: tuple of the dictionaries of the Location objects, exit masks and location numbers of the tile
+        """
+        offset, length = self.index[key]
+        self.file.seek(self.base + offset)
+        record = marshal.loads(zlib.decompress(self.file.read(length)))
+        locations = {}
+        exits = {}
+        numbers = {}
+        for x_value, y_value, index, number, mask, name, points, coffee, short, long in record:
+            location = Location(name, points, coffee, short, long)
+            location.index = index
+            locations[(x_value, y_value)] = location
+            exits[(x_value, y_value)] = mask
+            numbers[(x_value, y_value)] = number
+        self.loads += 1
+        return locations, exits, numbers
+
+    def get_exits(self, position):
+        """
+        :param position: Tuple representation of a position on the map
+        :return: integer exit mask of the location at position (see World.get_exits), or None if there is none
+        """
+        tile = self.tile(position)
+        if tile is None:
+            return None
+        return tile[1].get(position)
+
+    def get_number(self, position):
+        """
+        :param position: Tuple representation of a position on the map
+        :return: The integer location number at position, or None if there is none
+        """
+        tile = self.tile(position)
+        if tile is None:
+            return None
+        return tile[2].get(position)
+
+    def get_position(self, index):
+        """
+        Reads the position of one location from the list of every location's position, without reading any tile.
+        :param index: integer index of a location, as in Location.index
+        :return: A tuple representing the position of the location with that index
+        """
+        offset, length = self.positions
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        with self.lock:
+            self.file.seek(self.base + offset + index * 8)
+            data = self.file.read(8)
+        values = array.array("i")
+        values.frombytes(data)
+        return values[0], values[1]
+
+    def __getitem__(self, position):
+        tile = self.tile(position)
+        if tile is None:
+            raise KeyError(position)
+        return tile[0][position]
+
+    def __contains__(self, position):
+        tile = self.tile(position)
+        return tile is not None and position in tile[0]
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        offset, length = self.positions
+        read = 0
+        while read < length:
+            with self.lock:
+                self.file.seek(self.base + offset + read)
+                data = self.file.read(min(BATCH * 8, length - read))
+            read += len(data)
+            values = array.array("i")
+            values.frombytes(data)
+            for number in range(0, len(values), 2):
+                yield values[number], values[number + 1]
+
+    def resident(self):
+        """
+        :return: integer number of tiles held
+        """
+        return len(self.cache)
+
+    def close(self):
+        """
+        Closes the file. Tiles that are not held can no longer be read afterwards.
+        :return: none
+        """
+        self.file.close()
+
+
+class TiledWorld(World):
+    def __init__(self, filename, capacity=CAPACITY):
+        """
+        Creates a new TiledWorld: a World read from a tiled file (see compile_tiles) a tile at a time, as the
+        players get near, instead of all at once. Only the items, the BLOCKED location and the index of the tiles
+        are read up front. get_location, is_location, get_exits, get_position and available_moves answer as they do
+        for a World, and every location keeps the index it had in the World the file was compiled from, so game
+        states can be moved between the two.
+        There is no dense map and no index of location numbers to positions, as the world was already laid out when
+        the file was compiled: World.map is None and World.get_coordinates finds nothing. Whole-world tools that
+        read World.map (simulate.py, solver.py and benchmark.py) need a World.
+        :param filename: string that gives the name of the tiled file
+        :param capacity: (Optional) integer number of tiles held in memory at most
+        :return: a TiledWorld object
+        """
+        self.locations = Tiles(filename, capacity)
+        self.map = None
+        self.coordinates = {}
+        self.numbers = {}
+        self.blocked = Location(*self.locations.blocked)
+        self.descriptions = None
+        self.items = []
+        self.starts = []
+        self.total_items = 0
+        self.exits = {}
+        self.positions = None
+        for x_value, y_value, name, points, target, description in self.locations.records:
+            self.items.append(Item(name, points, target, description))
+            self.starts.append((x_value, y_value))
+            self.total_items += 1
+
+    def get_location(self, position):
+        """
+        See World.get_location
+        """
+        tile = self.locations.tile(position)
+        if tile is not None:
+            location = tile[0].get(position)
+            if location is not None:
+                return location
+        return self.blocked
+
+    def is_location(self, position):
+        """
+        See World.is_location
+        """
+        tile = self.locations.tile(position)
+        return tile is not None and position in tile[0]
+
+    def get_number(self, position):
+        """
+        See World.get_number
+        """
+        return self.locations.get_number(position)
+
+    def get_position(self, index):
+        """
+        See World.get_position
+        """
+        return self.locations.get_position(index)
+
+    def get_exits(self, position):
+        """
+        See World.get_exits
+        """
+        mask = self.locations.get_exits(position)
+        if mask is None:
+            return World.get_exits(self, position)
+        return mask
+
+
+def main(arguments):
+    """
+    Command line entry point.
+        python tiles.py MAP LOCATIONS ITEMS OUTPUT [SIZE]   compiles the world in the three text files to OUTPUT
+    :param arguments: list of command line arguments
+    :return: none
+    """
+    world = World(arguments[0], arguments[1], arguments[2])
+    tiles = compile_tiles(world, arguments[3], int(arguments[4]) if len(arguments) > 4 else SIZE)
+    print("{0} locations written to {1} in {2} tiles".format(len(world.locations), arguments[3], tiles))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
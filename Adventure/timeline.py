@@ -0,0 +1,108 @@
+import heapq
+
+
+class Timeline:
+    def __init__(self):
+        """
+        Creates a new, empty Timeline: world events scheduled for set times in the game, such as a coffee shop
+        closing or an item being moved. Pending events are kept in a heap ordered by time, so that checking for
+        due events is constant time and firing one is logarithmic in the number pending, however long the schedule.
+        Every event is a function called with the Game and the event's own arguments; the functions below cover
+        the usual ones.
+        :return: a Timeline object
+        """
+        self.script = []
+        self.pending = []
+
+    def schedule(self, hour, minute, function, *args):
+        """
+        Adds an event to the schedule. It fires the first time the game's clock reaches the given time.
+        :param hour: integer hour of the time of the event
+        :param minute: integer minute of the time of the event
+        :param function: function called as function(game, *args) when the event fires
+        :param args: further arguments of function
+        :return: none
+        """
+        # The position in the script breaks ties, so events at the same time fire in the order they were scheduled
+        event = (hour * 60 + minute, len(self.script), function, args)
+        self.script.append(event)
+        heapq.heappush(self.pending, event)
+
+    def advance(self, game, clock):
+        """
+        Fires, in order, every pending event whose time has been reached.
+        :param game: the Game object the events happen in
+        :param clock: integer minutes since midnight, the game's current time
+        :return: none
+        """
+        pending = self.pending
+        while pending and pending[0][0] <= clock:
+            minute, number, function, args = heapq.heappop(pending)
+            function(game, *args)
+
+    def reset(self):
+        """
+        Puts every event back in the schedule, fired or not.
+        :return: none
+        """
+        self.pending = list(self.script)
+        heapq.heapify(self.pending)
+
+    def copy(self):
+        """
+        :return: a new Timeline with the same schedule, and the same events still to fire, as this one. Events
+            scheduled on either afterwards are not added to the other.
+        """
+        duplicate = Timeline.__new__(Timeline)
+        duplicate.script = list(self.script)
+        duplicate.pending = list(self.pending)
+        return duplicate
+
+    def get_pending(self):
+        """
+        :return: list of the integer positions in the schedule of the events that have not fired, in no order
+        """
+        return [number for minute, number, function, args in self.pending]
+
+    def set_pending(self, numbers):
+        """
+        Makes exactly the given events the ones still to fire, as recorded by get_pending.
+        :param numbers: iterable of integer positions in the schedule
+        :return: none
+        """
+        self.pending = [self.script[number] for number in numbers]
+        heapq.heapify(self.pending)
+
+
+def close_coffee(game, position):
+    """
+    Stops the location at position selling coffee.
+    :param game: a Game object
+    :param position: Tuple representation of the position of a location on the map
+    :return: none
+    """
+    game.world_state.closed.add(position)
+
+
+def open_coffee(game, position):
+    """
+    Lets the location at position sell coffee again, if it did to begin with.
+    :param game: a Game object
+    :param position: Tuple representation of the position of a location on the map
+    :return: none
+    """
+    game.world_state.closed.discard(position)
+
+
+def move_item(game, name, source, destination):
+    """
+    Moves an item from one location to another, if it is still there.
+    :param game: a Game object
+    :param name: string name of the item
+    :param source: Tuple representation of the position the item is at
+    :param destination: Tuple representation of the position to move it to
+    :return: none
+    """
+    item = game.world_state.pop_item(source, name)
+    if item is not None:
+        game.world_state.add_item(destination, item)